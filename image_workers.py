@@ -0,0 +1,35 @@
+"""Image rendering for the process pool in src.images.variants.
+
+Kept outside the src package on purpose: spawned workers import this module
+and nothing else, so they don't build the FastAPI app, the database engine or
+the redis client, and don't need the app's settings in their environment.
+"""
+import io
+from typing import Dict
+from PIL import Image, ImageOps
+
+# longest edge, in pixels, of each stored variant
+IMAGE_VARIANTS = {
+    "thumbnail": 320,
+    "card": 800,
+    "full": 1920
+}
+VARIANT_FORMAT = "WEBP"
+VARIANT_QUALITY = 80
+
+def render_variants(data: bytes) -> Dict[str, bytes]:
+    with Image.open(io.BytesIO(data)) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+
+        variants = {}
+        for name, edge in IMAGE_VARIANTS.items():
+            resized = image.copy()
+            # thumbnail() keeps the aspect ratio and never upscales
+            resized.thumbnail((edge, edge), Image.Resampling.LANCZOS)
+            out = io.BytesIO()
+            resized.save(out, format=VARIANT_FORMAT, quality=VARIANT_QUALITY)
+            variants[name] = out.getvalue()
+
+    return variants
@@ -0,0 +1,28 @@
+"""add houses listing index
+
+Revision ID: 3b7e91c2a4d0
+Revises: f200252ad8d4
+Create Date: 2026-10-17 09:12:41.302118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b7e91c2a4d0'
+down_revision: Union[str, Sequence[str], None] = 'f200252ad8d4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_houses_created_at_house_uid', 'houses', ['created_at', 'house_uid'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_houses_created_at_house_uid', table_name='houses')
@@ -0,0 +1,30 @@
+"""add house updated_at
+
+Revision ID: 5e2b8d7a9c14
+Revises: a6d0c3f18e27
+Create Date: 2026-10-17 13:41:52.603817
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e2b8d7a9c14'
+down_revision: Union[str, Sequence[str], None] = 'a6d0c3f18e27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('houses', sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.func.now(), nullable=False))
+    op.create_index('ix_reviews_house_uid', 'reviews', ['house_uid'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_reviews_house_uid', table_name='reviews')
+    op.drop_column('houses', 'updated_at')
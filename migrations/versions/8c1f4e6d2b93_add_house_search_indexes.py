@@ -0,0 +1,39 @@
+"""add house search indexes
+
+Revision ID: 8c1f4e6d2b93
+Revises: 3b7e91c2a4d0
+Create Date: 2026-10-17 10:03:17.845220
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c1f4e6d2b93'
+down_revision: Union[str, Sequence[str], None] = '3b7e91c2a4d0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# keep in sync with HOUSE_SEARCH_DOCUMENT in src/houses/service.py
+SEARCH_DOCUMENT = (
+    "to_tsvector('english', coalesce(houses.title, '') || ' ' || "
+    "coalesce(houses.description, '') || ' ' || coalesce(houses.address, ''))"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("CREATE INDEX ix_houses_address_trgm ON houses USING gin (address gin_trgm_ops)")
+    op.execute("CREATE INDEX ix_houses_state_trgm ON houses USING gin (state gin_trgm_ops)")
+    op.execute(f"CREATE INDEX ix_houses_search_document ON houses USING gin (({SEARCH_DOCUMENT}))")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_houses_search_document', table_name='houses')
+    op.drop_index('ix_houses_state_trgm', table_name='houses')
+    op.drop_index('ix_houses_address_trgm', table_name='houses')
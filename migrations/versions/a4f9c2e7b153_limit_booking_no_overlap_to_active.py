@@ -0,0 +1,41 @@
+"""limit booking_no_overlap to active bookings
+
+Revision ID: a4f9c2e7b153
+Revises: d5e8a1c4f736
+Create Date: 2026-10-18 00:22:16.840137
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4f9c2e7b153'
+down_revision: Union[str, Sequence[str], None] = 'd5e8a1c4f736'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # list the statuses that hold dates rather than the ones that don't, so refund_required
+    # (and any later inactive status) can't clash with the stay that took its dates
+    op.execute("ALTER TABLE booking DROP CONSTRAINT booking_no_overlap")
+    op.execute(
+        "ALTER TABLE booking ADD CONSTRAINT booking_no_overlap EXCLUDE USING gist "
+        "(house_uid WITH =, tsrange(start_date, end_date, '[)') WITH &&) "
+        "WHERE (status IN ('pending', 'paid'))"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("UPDATE booking SET status = 'canceled' WHERE status = 'refund_required'")
+    op.execute("ALTER TABLE booking DROP CONSTRAINT booking_no_overlap")
+    op.execute(
+        "ALTER TABLE booking ADD CONSTRAINT booking_no_overlap EXCLUDE USING gist "
+        "(house_uid WITH =, tsrange(start_date, end_date, '[)') WITH &&) "
+        "WHERE (status NOT IN ('canceled', 'expired'))"
+    )
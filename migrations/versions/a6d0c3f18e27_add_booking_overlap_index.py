@@ -0,0 +1,28 @@
+"""add booking overlap index
+
+Revision ID: a6d0c3f18e27
+Revises: 8c1f4e6d2b93
+Create Date: 2026-10-17 11:26:05.119374
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6d0c3f18e27'
+down_revision: Union[str, Sequence[str], None] = '8c1f4e6d2b93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_booking_house_uid_start_date_end_date', 'booking', ['house_uid', 'start_date', 'end_date'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_booking_house_uid_start_date_end_date', table_name='booking')
@@ -0,0 +1,36 @@
+"""add booking ended_at
+
+Revision ID: a93e7c5d1b68
+Revises: f4c2d9e1a357
+Create Date: 2026-10-17 19:34:52.118930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a93e7c5d1b68'
+down_revision: Union[str, Sequence[str], None] = 'f4c2d9e1a357'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('booking', sa.Column('ended_at', sa.TIMESTAMP(), nullable=True))
+    # stays that finished before this column existed were already handled by the old job,
+    # don't email their guests and hosts a second time
+    op.execute("UPDATE booking SET ended_at = end_date WHERE end_date <= now()")
+    op.create_index(
+        'ix_booking_unended_end_date', 'booking', ['end_date'], unique=False,
+        postgresql_where=sa.text("ended_at IS NULL AND status = 'paid'")
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_booking_unended_end_date', table_name='booking')
+    op.drop_column('booking', 'ended_at')
@@ -0,0 +1,43 @@
+"""add house_rate_rules
+
+Revision ID: b1d6e9a4c872
+Revises: e2a8f5c3b791
+Create Date: 2026-10-17 21:26:09.774135
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+import sqlmodel
+
+# revision identifiers, used by Alembic.
+revision: str = 'b1d6e9a4c872'
+down_revision: Union[str, Sequence[str], None] = 'e2a8f5c3b791'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('house_rate_rules',
+    sa.Column('rule_uid', sa.Uuid(), nullable=False),
+    sa.Column('house_uid', sa.Uuid(), nullable=False),
+    sa.Column('kind', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('nightly_price', sa.Float(), nullable=True),
+    sa.Column('start_date', sa.Date(), nullable=True),
+    sa.Column('end_date', sa.Date(), nullable=True),
+    sa.Column('min_nights', sa.Integer(), nullable=True),
+    sa.Column('discount_percent', sa.Float(), nullable=True),
+    sa.Column('created_at', sa.TIMESTAMP(), nullable=False),
+    sa.ForeignKeyConstraint(['house_uid'], ['houses.house_uid'], ),
+    sa.PrimaryKeyConstraint('rule_uid')
+    )
+    op.create_index('ix_house_rate_rules_house_uid', 'house_rate_rules', ['house_uid'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_house_rate_rules_house_uid', table_name='house_rate_rules')
+    op.drop_table('house_rate_rules')
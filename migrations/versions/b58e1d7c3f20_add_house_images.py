@@ -0,0 +1,44 @@
+"""add house_images
+
+Revision ID: b58e1d7c3f20
+Revises: e71d5b0c8f42
+Create Date: 2026-10-17 17:40:21.913047
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+import sqlmodel
+
+# revision identifiers, used by Alembic.
+revision: str = 'b58e1d7c3f20'
+down_revision: Union[str, Sequence[str], None] = 'e71d5b0c8f42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('house_images',
+    sa.Column('image_uid', sa.Uuid(), nullable=False),
+    sa.Column('house_uid', sa.Uuid(), nullable=False),
+    sa.Column('position', sa.Integer(), nullable=False),
+    sa.Column('content_hash', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('original_url', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('thumbnail_url', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('card_image_url', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('full_image_url', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('created_at', sa.TIMESTAMP(), nullable=False),
+    sa.ForeignKeyConstraint(['content_hash'], ['stored_images.content_hash'], ),
+    sa.ForeignKeyConstraint(['house_uid'], ['houses.house_uid'], ),
+    sa.PrimaryKeyConstraint('image_uid')
+    )
+    op.create_index('ix_house_images_house_uid_position', 'house_images', ['house_uid', 'position'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_house_images_house_uid_position', table_name='house_images')
+    op.drop_table('house_images')
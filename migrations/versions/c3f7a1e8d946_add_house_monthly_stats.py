@@ -0,0 +1,53 @@
+"""add house_monthly_stats
+
+Revision ID: c3f7a1e8d946
+Revises: b1d6e9a4c872
+Create Date: 2026-10-17 22:03:51.336418
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3f7a1e8d946'
+down_revision: Union[str, Sequence[str], None] = 'b1d6e9a4c872'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('house_monthly_stats',
+    sa.Column('house_uid', sa.Uuid(), nullable=False),
+    sa.Column('month', sa.Date(), nullable=False),
+    sa.Column('booked_nights', sa.Integer(), nullable=False),
+    sa.Column('bookings', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Float(), nullable=False),
+    sa.Column('updated_at', sa.TIMESTAMP(), nullable=False),
+    sa.ForeignKeyConstraint(['house_uid'], ['houses.house_uid'], ),
+    sa.PrimaryKeyConstraint('house_uid', 'month')
+    )
+    # existing paid bookings; afterwards `python -m src.houses.analytics` does the same rebuild
+    op.execute("""
+        INSERT INTO house_monthly_stats (house_uid, month, booked_nights, bookings, revenue, updated_at)
+        SELECT b.house_uid,
+               date_trunc('month', n.night)::date,
+               count(*),
+               count(*) FILTER (WHERE n.night = b.start_date::date),
+               sum(b.amount::float8 / greatest(b.end_date::date - b.start_date::date, 1)),
+               now()
+        FROM booking b
+        CROSS JOIN LATERAL generate_series(
+            b.start_date::date, greatest(b.end_date::date, b.start_date::date + 1) - 1, interval '1 day'
+        ) AS n(night)
+        WHERE b.status = 'paid'
+        GROUP BY b.house_uid, date_trunc('month', n.night)
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('house_monthly_stats')
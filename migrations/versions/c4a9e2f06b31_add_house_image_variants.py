@@ -0,0 +1,33 @@
+"""add house image variants
+
+Revision ID: c4a9e2f06b31
+Revises: 5e2b8d7a9c14
+Create Date: 2026-10-17 15:08:33.270964
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+import sqlmodel
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4a9e2f06b31'
+down_revision: Union[str, Sequence[str], None] = '5e2b8d7a9c14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('houses', sa.Column('thumbnail_url', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+    op.add_column('houses', sa.Column('card_image_url', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+    op.add_column('houses', sa.Column('full_image_url', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('houses', 'full_image_url')
+    op.drop_column('houses', 'card_image_url')
+    op.drop_column('houses', 'thumbnail_url')
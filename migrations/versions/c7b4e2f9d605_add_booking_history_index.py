@@ -0,0 +1,28 @@
+"""add booking history index
+
+Revision ID: c7b4e2f9d605
+Revises: a93e7c5d1b68
+Create Date: 2026-10-17 20:05:13.640288
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7b4e2f9d605'
+down_revision: Union[str, Sequence[str], None] = 'a93e7c5d1b68'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_booking_user_uid_start_date', 'booking', ['user_uid', 'start_date'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_booking_user_uid_start_date', table_name='booking')
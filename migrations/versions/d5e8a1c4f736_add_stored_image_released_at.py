@@ -0,0 +1,32 @@
+"""add stored_images released_at
+
+Revision ID: d5e8a1c4f736
+Revises: c3f7a1e8d946
+Create Date: 2026-10-17 23:41:07.215904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5e8a1c4f736'
+down_revision: Union[str, Sequence[str], None] = 'c3f7a1e8d946'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('stored_images', sa.Column('released_at', sa.TIMESTAMP(), nullable=True))
+    op.create_index('ix_stored_images_released_at', 'stored_images', ['released_at'], unique=False,
+                    postgresql_where=sa.text('released_at IS NOT NULL'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_stored_images_released_at', table_name='stored_images',
+                  postgresql_where=sa.text('released_at IS NOT NULL'))
+    op.drop_column('stored_images', 'released_at')
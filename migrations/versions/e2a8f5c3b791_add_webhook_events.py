@@ -0,0 +1,43 @@
+"""add webhook_events
+
+Revision ID: e2a8f5c3b791
+Revises: c7b4e2f9d605
+Create Date: 2026-10-17 20:47:38.502716
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+import sqlmodel
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2a8f5c3b791'
+down_revision: Union[str, Sequence[str], None] = 'c7b4e2f9d605'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('webhook_events',
+    sa.Column('event_id', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('type', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('status', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('last_error', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('next_attempt_at', sa.TIMESTAMP(), nullable=False),
+    sa.Column('received_at', sa.TIMESTAMP(), nullable=False),
+    sa.Column('processed_at', sa.TIMESTAMP(), nullable=True),
+    sa.PrimaryKeyConstraint('event_id')
+    )
+    op.create_index('ix_webhook_events_status_next_attempt_at', 'webhook_events', ['status', 'next_attempt_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_webhook_events_status_next_attempt_at', table_name='webhook_events')
+    op.drop_table('webhook_events')
@@ -0,0 +1,44 @@
+"""add stored_images
+
+Revision ID: e71d5b0c8f42
+Revises: c4a9e2f06b31
+Create Date: 2026-10-17 16:52:10.448309
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+import sqlmodel
+
+# revision identifiers, used by Alembic.
+revision: str = 'e71d5b0c8f42'
+down_revision: Union[str, Sequence[str], None] = 'c4a9e2f06b31'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('stored_images',
+    sa.Column('content_hash', sqlmodel.sql.sqltypes.AutoString(length=64), nullable=False),
+    sa.Column('original_key', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('original_url', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('thumbnail_url', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('card_image_url', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('full_image_url', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('size_bytes', sa.Integer(), nullable=False),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.TIMESTAMP(), nullable=False),
+    sa.PrimaryKeyConstraint('content_hash')
+    )
+    op.add_column('houses', sa.Column('image_hash', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+    op.create_foreign_key('houses_image_hash_fkey', 'houses', 'stored_images', ['image_hash'], ['content_hash'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('houses_image_hash_fkey', 'houses', type_='foreignkey')
+    op.drop_column('houses', 'image_hash')
+    op.drop_table('stored_images')
@@ -0,0 +1,41 @@
+"""add booking expiry index
+
+Revision ID: f4c2d9e1a357
+Revises: d0f3a6b8e214
+Create Date: 2026-10-17 18:58:30.271564
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4c2d9e1a357'
+down_revision: Union[str, Sequence[str], None] = 'd0f3a6b8e214'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_booking_status_expires_at', 'booking', ['status', 'expires_at'], unique=False)
+    # expired bookings stop holding their dates, same as canceled ones
+    op.execute("ALTER TABLE booking DROP CONSTRAINT booking_no_overlap")
+    op.execute(
+        "ALTER TABLE booking ADD CONSTRAINT booking_no_overlap EXCLUDE USING gist "
+        "(house_uid WITH =, tsrange(start_date, end_date, '[)') WITH &&) "
+        "WHERE (status NOT IN ('canceled', 'expired'))"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("ALTER TABLE booking DROP CONSTRAINT booking_no_overlap")
+    op.execute(
+        "ALTER TABLE booking ADD CONSTRAINT booking_no_overlap EXCLUDE USING gist "
+        "(house_uid WITH =, tsrange(start_date, end_date, '[)') WITH &&) "
+        "WHERE (status NOT IN ('canceled'))"
+    )
+    op.drop_index('ix_booking_status_expires_at', table_name='booking')
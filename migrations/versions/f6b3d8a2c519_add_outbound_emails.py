@@ -0,0 +1,44 @@
+"""add outbound_emails
+
+Revision ID: f6b3d8a2c519
+Revises: a4f9c2e7b153
+Create Date: 2026-10-18 10:14:52.630418
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+import sqlmodel
+
+# revision identifiers, used by Alembic.
+revision: str = 'f6b3d8a2c519'
+down_revision: Union[str, Sequence[str], None] = 'a4f9c2e7b153'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('outbound_emails',
+    sa.Column('email_uid', sa.Uuid(), nullable=False),
+    sa.Column('recipients', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('subject', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('body', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('status', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('last_error', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('next_attempt_at', sa.TIMESTAMP(), nullable=False),
+    sa.Column('created_at', sa.TIMESTAMP(), nullable=False),
+    sa.Column('sent_at', sa.TIMESTAMP(), nullable=True),
+    sa.PrimaryKeyConstraint('email_uid')
+    )
+    op.create_index('ix_outbound_emails_status_next_attempt_at', 'outbound_emails', ['status', 'next_attempt_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_outbound_emails_status_next_attempt_at', table_name='outbound_emails')
+    op.drop_table('outbound_emails')
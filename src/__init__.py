@@ -1,18 +1,28 @@
 from fastapi import FastAPI
+from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
 from src.db.main import init_db
 from src.auth.routes import auth_router
 from src.houses.routes import house_router
 from src.booking.routes import booking_router
 from src.reviews.routes import review_router
+from src.exports.routes import export_router
 from src.scheduler.end_booking_email_scheduler import start_scheduler
+from src.images.variants import shutdown_image_executor
+from src.storage import get_storage
+from src.storage.routes import storage_router
+from src.payments import stripe_gateway
+from src.config import Config
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print("Starting server")
     await init_db()
+    await get_storage().warm()
     start_scheduler()
     yield
+    shutdown_image_executor()
+    await stripe_gateway.aclose()
     print("Stopping server")
 
 version = "v1"
@@ -35,4 +45,9 @@ async def success():
 app.include_router(auth_router, prefix=f"/api/{version}/auth", tags=["auth"])
 app.include_router(house_router, prefix=f"/api/{version}/houses", tags=["Houses"])
 app.include_router(booking_router, prefix=f"/api/{version}/booking", tags=["Bookings"])
-app.include_router(review_router, prefix=f"/api/{version}/reviews", tags=["reviews"])
\ No newline at end of file
+app.include_router(review_router, prefix=f"/api/{version}/reviews", tags=["reviews"])
+app.include_router(export_router, prefix=f"/api/{version}/exports", tags=["exports"])
+app.include_router(storage_router, prefix=f"/api/{version}/storage", tags=["storage"])
+
+if Config.STORAGE_BACKEND == "local":
+    app.mount(Config.LOCAL_STORAGE_URL, StaticFiles(directory=Config.LOCAL_STORAGE_DIR, check_dir=False), name="media")
\ No newline at end of file
@@ -0,0 +1,122 @@
+import logging
+from datetime import date, datetime, timedelta
+from typing import List
+from redis.exceptions import RedisError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from src.db.redis import redis_client
+from src.houses.cache import cache_key
+from src.booking.model import Booking, INACTIVE_BOOKING_STATUSES
+
+# bit n of a house's bitmap is the night starting CALENDAR_EPOCH + n days
+CALENDAR_EPOCH = date(2020, 1, 1)
+CALENDAR_KEY_PREFIX = "calendar:"
+MAX_CALENDAR_DAYS = 366
+# bounds how long a missed or raced mark() can leave a bitmap wrong; the next read rebuilds it from SQL
+CALENDAR_TTL_SECONDS = 3600
+
+def day_offset(day: date) -> int:
+    return max(0, (day - CALENDAR_EPOCH).days)
+
+def night_offsets(start_date: datetime, end_date: datetime) -> range:
+    first = day_offset(start_date.date())
+    last = day_offset(end_date.date())
+    # a same-day stay is still charged (and held) as one night, see nights_in_between
+    return range(first, max(last, first + 1))
+
+def _bit_is_set(bitmap: bytes, offset: int) -> bool:
+    byte_index = offset // 8
+    if byte_index >= len(bitmap):
+        return False
+    return bool(bitmap[byte_index] & (0x80 >> (offset % 8)))
+
+class HouseCalendar:
+    def _key(self, house_uid) -> str:
+        # canonical like the house cache, so every spelling of a uid reads the bitmap mark() updates
+        return f"{CALENDAR_KEY_PREFIX}{cache_key(house_uid)}"
+
+    async def rebuild(self, house_uid, session: AsyncSession) -> None:
+        stmt = select(Booking.start_date, Booking.end_date).where(
+            Booking.house_uid == house_uid,
+            Booking.status.not_in(INACTIVE_BOOKING_STATUSES),
+            Booking.end_date >= datetime.combine(date.today(), datetime.min.time())
+        )
+        result = await session.exec(stmt)
+
+        # always at least one byte so an empty calendar still counts as built
+        bitmap = bytearray(1)
+        for start_date, end_date in result.all():
+            for offset in night_offsets(start_date, end_date):
+                byte_index = offset // 8
+                if byte_index >= len(bitmap):
+                    bitmap.extend(bytes(byte_index + 1 - len(bitmap)))
+                bitmap[byte_index] |= 0x80 >> (offset % 8)
+
+        await redis_client.set(self._key(house_uid), bytes(bitmap), ex=CALENDAR_TTL_SECONDS)
+
+    async def invalidate(self, house_uid) -> None:
+        try:
+            await redis_client.delete(self._key(house_uid))
+        except RedisError as e:
+            logging.error(e)
+
+    async def _load(self, house_uid, first: int, last: int, session: AsyncSession) -> bytes:
+        key = self._key(house_uid)
+        if not await redis_client.exists(key):
+            await self.rebuild(house_uid, session)
+
+        # GETRANGE is byte addressed, re-base the offsets on the first byte fetched
+        return await redis_client.getrange(key, first // 8, last // 8)
+
+    async def mark(self, house_uid, start_date: datetime, end_date: datetime, booked: bool) -> None:
+        # call after the booking change is committed; an unbuilt calendar picks it up when it is built
+        key = self._key(house_uid)
+        try:
+            if not await redis_client.exists(key):
+                return
+            async with redis_client.pipeline(transaction=False) as pipe:
+                for offset in night_offsets(start_date, end_date):
+                    pipe.setbit(key, offset, 1 if booked else 0)
+                await pipe.execute()
+        except RedisError as e:
+            logging.error(e)
+            # a half-applied update must not outlive this call, drop the bitmap so it's rebuilt
+            await self.invalidate(house_uid)
+
+    async def _days_from_bookings(self, house_uid, first: int, last: int, session: AsyncSession) -> List[bool]:
+        # the same answer straight from the booking table, for when redis is unavailable
+        stmt = select(Booking.start_date, Booking.end_date).where(
+            Booking.house_uid == house_uid,
+            Booking.status.not_in(INACTIVE_BOOKING_STATUSES),
+            Booking.start_date < datetime.combine(CALENDAR_EPOCH + timedelta(days=last + 1), datetime.min.time()),
+            Booking.end_date >= datetime.combine(CALENDAR_EPOCH + timedelta(days=first), datetime.min.time())
+        )
+        result = await session.exec(stmt)
+
+        days = [False] * (last - first + 1)
+        for start_date, end_date in result.all():
+            for offset in night_offsets(start_date, end_date):
+                if first <= offset <= last:
+                    days[offset - first] = True
+        return days
+
+    async def get_days(self, house_uid, start: date, end: date, session: AsyncSession) -> List[bool]:
+        first = day_offset(start)
+        last = day_offset(end)
+        try:
+            bitmap = await self._load(house_uid, first, last, session)
+        except RedisError as e:
+            logging.error(e)
+            return await self._days_from_bookings(house_uid, first, last, session)
+        base = (first // 8) * 8
+
+        return [_bit_is_set(bitmap, offset - base) for offset in range(first, last + 1)]
+
+    async def is_free(self, house_uid, start_date: datetime, end_date: datetime, session: AsyncSession) -> bool:
+        nights = night_offsets(start_date, end_date)
+        bitmap = await self._load(house_uid, nights.start, nights.stop - 1, session)
+        base = (nights.start // 8) * 8
+
+        return not any(_bit_is_set(bitmap, offset - base) for offset in nights)
+
+house_calendar = HouseCalendar()
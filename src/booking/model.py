@@ -1,10 +1,26 @@
 from sqlmodel import SQLModel, Field, Column
+from sqlalchemy import Index, text
 import sqlalchemy.dialects.postgresql as pg
 import uuid
 from datetime import datetime
+from typing import Optional
+
+# bookings in these states no longer hold the house for their dates
+INACTIVE_BOOKING_STATUSES = ("canceled", "expired", "refund_required")
 
 class Booking(SQLModel, table=True):
     __tablename__="booking"
+    __table_args__ = (
+        # serves the per-house date overlap probes (availability search, is_house_available);
+        # the booking_no_overlap exclusion constraint from the migrations backs up book_house's lock
+        Index("ix_booking_house_uid_start_date_end_date", "house_uid", "start_date", "end_date"),
+        # newest-first booking history for a guest; a host's house history walks the index above
+        Index("ix_booking_user_uid_start_date", "user_uid", "start_date"),
+        # lets the expiry sweeper find stale pending bookings oldest-first without a scan
+        Index("ix_booking_status_expires_at", "status", "expires_at"),
+        # only stays the end-of-stay processor hasn't handled yet
+        Index("ix_booking_unended_end_date", "end_date", postgresql_where=text("ended_at IS NULL AND status = 'paid'")),
+    )
     booking_uid: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     house_uid: uuid.UUID = Field(foreign_key="houses.house_uid")
     user_uid: uuid.UUID = Field(foreign_key="Users.uid")
@@ -15,9 +31,12 @@ class Booking(SQLModel, table=True):
     booked_at: datetime = Field(sa_column = Column(
         pg.TIMESTAMP,
         nullable=False,
-        default=datetime.now()))
+        default=datetime.now))
     expires_at: datetime = Field(sa_column = Column(
         pg.TIMESTAMP))
+    # set once the end-of-stay emails went out and the house was reopened
+    ended_at: Optional[datetime] = Field(sa_column = Column(
+        pg.TIMESTAMP))
     stripe_session_id: str = Field(default=None, nullable=True)
     stripe_payment_intent: str = Field(default=None, nullable=True)
 
@@ -1,18 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, status, Request, BackgroundTasks, Query
 from sqlmodel.ext.asyncio.session import AsyncSession
 from starlette.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse
 import stripe
-from src.booking.service import BookingService
-from src.booking.schema import BookingModel, BookingCreateModel
+from src.booking.service import BookingService, CHECKOUT_EXPIRY_MINUTES
+from src.booking.schema import BookingModel, BookingCreateModel, BOOKING_FIELDS, BOOKING_PROJECTIONS
+from src.projection import resolve_projection
+from typing import List, Literal, Optional
 from src.auth.dependencies import AccessTokenBearer, get_current_user, RoleChecker
 from src.db.models import User
 from src.auth.service import UserService
 from src.houses.service import HouseService
 from src.config import Config
 from src.auth.utils import to_naive_utc
-from src.mail.mail import create_message, mails
 from src.db.main import get_session
+from src.payments import stripe_gateway, PaymentGatewayError
+from src.payments.inbox import webhook_inbox
+import json
+import uuid
+from src.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from datetime import date, datetime, time, timedelta
 
 stripe.api_key = Config.STRIPE_SECRET_KEY
 booking_router = APIRouter()
@@ -33,13 +40,37 @@ async def get_all_bookings(session: AsyncSession= Depends(get_session),
         )
     return bookings
 
+@booking_router.get("/quote")
+async def get_booking_quote(house_uid: str, check_in: date, check_out: date, session: AsyncSession= Depends(get_session),
+                            token_details: dict= Depends(AccessTokenBearer())):
+    if check_out <= check_in:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="check_out must be after check_in"
+        )
+    house = await house_service.get_house(house_uid, session)
+    if not house:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="House doesn't exist")
+
+    quote = await booking_service.get_quote(
+        house, datetime.combine(check_in, time.min), datetime.combine(check_out, time.min), session
+    )
+
+    return {**quote, "currency": CURRENCY}
+
 @booking_router.post("/book_house", status_code=status.HTTP_201_CREATED)
 async def book_house( booking_model: BookingCreateModel,
      current_user: User= Depends(get_current_user), session: AsyncSession = Depends(get_session)
 ):
     booking_model.user_uid = current_user.uid
     user_email = current_user.email
-    house = await house_service.get_house_by_id(booking_model.house_uid, session)
+    try:
+        booking_model.house_uid = str(uuid.UUID(booking_model.house_uid))
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="House doesn't exist")
+    house = await house_service.get_house(booking_model.house_uid, session)
+    if not house:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="House doesn't exist")
     host_uid = house.user_uid
 
     host_user = await user_service.get_user_by_id(host_uid, session)
@@ -50,27 +81,16 @@ async def book_house( booking_model: BookingCreateModel,
     booking = await booking_service.book_house(booking_model, session)
     if not booking:
         raise HTTPException(status_code=400, detail="Booking failed, House is already booked for the selected dates")
-    def _create_session():
-        return stripe.checkout.Session.create(
-            payment_method_types=["card"],
-            line_items=[
-                {
-                    "price_data":{
-                        "currency": CURRENCY,
-                        "product_data": {"name": f"Booking: {house.title}"},
-                        "unit_amount": int(booking.amount*100)
-                    },
-                    "quantity": 1
-                }],
-                mode="payment",
-                success_url=f"{Config.SUCCESS_URL}?session_id={{CHECKOUT_SESSION_ID}}",
-                cancel_url=Config.CANCEL_URL,
-                metadata={"booking_uid": str(booking.booking_uid)},
-                customer_email=user_email
+    try:
+        stripe_session = await stripe_gateway.create_checkout_session(
+            booking.booking_uid, booking.amount, CURRENCY, f"Booking: {house.title}", user_email,
+            datetime.now() + timedelta(minutes=CHECKOUT_EXPIRY_MINUTES)
         )
-    stripe_session = await run_in_threadpool(_create_session)
-    booking.stripe_session_id = stripe_session.id
-    booking.stripe_payment_intent = stripe_session.payment_intent
+    except PaymentGatewayError as e:
+        await booking_service.abandon_booking(booking, session)
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+    booking.stripe_session_id = stripe_session["id"]
+    booking.stripe_payment_intent = stripe_session.get("payment_intent")
     await session.commit()
     # message = create_message(
     #     subject="Booking Confirmation",
@@ -86,8 +106,8 @@ async def book_house( booking_model: BookingCreateModel,
     # await mails.send_message(message)
     return {
         "booking_id": booking.booking_uid,
-        "stripe_session_id": stripe_session.id,
-        "checkout_url": stripe_session.url
+        "stripe_session_id": stripe_session["id"],
+        "checkout_url": stripe_session["url"]
     }
 
 @booking_router.post("/webhook")
@@ -99,59 +119,8 @@ async def stripe_webhook(request: Request, session: AsyncSession= Depends(get_se
         event = await run_in_threadpool(stripe.Webhook.construct_event, payload, sig_header, Config.STRIPE_WEBHOOK_SECRET)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Webhook error: {e}")
-    if event.type == "checkout.session.completed":
-        session_obj = event["data"]["object"]
-        booking_id = session_obj["metadata"]["booking_uid"]
-        payment_intent = session_obj["payment_intent"]
-
-        booking = await booking_service.get_specific_booking(booking_id, session)
-        if not booking:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail={"error": "Booking not found"}
-            )
-        if booking.status!="paid":
-            booking.status="paid"
-            booking.expires_at = None
-            booking.stripe_payment_intent = payment_intent
-            house = await house_service.get_house_by_id(booking.house_uid, session)
-            user = await user_service.get_user_by_id(booking.user_uid, session)
-            host_uid = house.user_uid
-            host = await user_service.get_user_by_id(host_uid, session)
-            host_email = host.email
-            user_email = user.email
-            message = create_message(
-                subject="Booking Confirmation",
-                recipients=[user_email],  
-                body=f"<h2>Your booking for house {house.title} with id {booking.house_uid} from {booking.start_date} to {booking.end_date} is confirmed.</h2>"
-            )
-            host_message = create_message(
-                subject="Your House Was Booked",
-                recipients=[host_email],
-                body=f"<h2>Your house '{house.title}' was booked from {booking.start_date} to {booking.end_date}.</h2>"
-            )
-            await mails.send_message(host_message)
-            await mails.send_message(message)
-
-    elif event.type == "checkout.session.expired":
-        session_obj = event["data"]["object"]
-        booking_id = session_obj["metadata"]["booking_uid"]
-
-        booking = await booking_service.get_specific_booking(booking_id, session)
-        if not booking:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail={"error": "Booking not found"}
-            )
-        if booking.status!="paid":
-            await booking_service.cancel_booking(booking_id, session)
-            user = await user_service.get_user_by_id(booking.user_uid, session)
-            message = create_message(
-                subject="Booking Expired",
-                recipients=[user.email],
-                body=f"<h2>Your booking for house with id {booking.house_uid} from {booking.start_date} to {booking.end_date} has expired. Payment Failed.</h2>"
-            )
-            await mails.send_message(message)
+    # only the insert happens here, the inbox worker does the rest; Stripe redeliveries hit the same event id
+    await webhook_inbox.record(event.id, event.type, json.loads(payload), session)
     return JSONResponse({
         "received": True
     })
@@ -164,27 +133,63 @@ async def get_details_of_a_specific_booking(booking_uid: str, session: AsyncSess
         raise HTTPException(status_code=400, detail="getting details of the booking failed")
     return booking_detail
 
+def booking_fields(fields: Optional[str]= None, projection: Optional[Literal["card", "detail"]]= None) -> Optional[List[str]]:
+    try:
+        return resolve_projection(fields, projection, BOOKING_PROJECTIONS, BOOKING_FIELDS)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+def history_filters(status: Optional[Literal["pending", "paid", "canceled", "expired", "refund_required"]]= None,
+                    date_from: Optional[date]= Query(None, alias="from"), date_to: Optional[date]= Query(None, alias="to")) -> dict:
+    # filters on the stay's start date, from inclusive and to exclusive
+    return {
+        "booking_status": status,
+        "date_from": datetime.combine(date_from, time.min) if date_from else None,
+        "date_to": datetime.combine(date_to, time.min) if date_to else None
+    }
+
 @booking_router.get("/booking_history/{user_uid}")
-async def get_users_booking_history(user_uid: str, session: AsyncSession= Depends(get_session),
+async def get_users_booking_history(user_uid: str, fields: Optional[List[str]]= Depends(booking_fields),
+                                    limit: int= Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), cursor: Optional[str]= None,
+                                    filters: dict= Depends(history_filters),
+                                             session: AsyncSession= Depends(get_session),
                                              token_details: dict= Depends(AccessTokenBearer()),
                                              current_user: User= Depends(get_current_user)):
     user_uid = current_user.uid
-    booking_history = await booking_service.get_users_booking_history(user_uid, session)
+    try:
+        bookings, next_cursor = await booking_service.get_users_booking_history(
+            user_uid, session, limit, cursor, fields, **filters
+        )
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
 
-    if booking_history:
-        return booking_history
-    raise HTTPException(status_code=400, detail="getting user Booking history failed")
+    return {
+        "bookings": bookings,
+        "next_cursor": next_cursor
+    }
 
 @booking_router.get("/house/{house_uid}")
-async def get_all_bookings_for_a_house(house_uid: str, session: AsyncSession= Depends(get_session),
+async def get_all_bookings_for_a_house(house_uid: str,
+                                       limit: int= Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), cursor: Optional[str]= None,
+                                       filters: dict= Depends(history_filters),
+                                       session: AsyncSession= Depends(get_session),
                                        current_user: User= Depends(get_current_user),
                                              token_details: dict= Depends(AccessTokenBearer()), _: bool= Depends(RoleChecker(["host", "admin"]))):
     user_uid  = current_user.uid
-    booking_history = await booking_service.get_all_booking_for_house(house_uid, user_uid, session)
+    try:
+        bookings, next_cursor = await booking_service.get_all_booking_for_house(
+            house_uid, user_uid, session, limit, cursor, **filters
+        )
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
 
-    if booking_history:
-        return booking_history
-    raise HTTPException(status_code=400, detail="Booking failed")
+    return {
+        "bookings": bookings,
+        "next_cursor": next_cursor
+    }
 
 @booking_router.delete("/{booking_uid}")
 async def cancel_booking(booking_uid: str, session: AsyncSession= Depends(get_session),
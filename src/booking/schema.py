@@ -1,7 +1,17 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, model_validator
 from datetime import datetime
 from typing import Optional
 import uuid 
+from src.auth.utils import to_naive_utc
+
+BOOKING_FIELDS = (
+    "booking_uid", "house_uid", "user_uid", "start_date", "end_date", "status", "amount",
+    "booked_at", "expires_at", "ended_at", "stripe_session_id", "stripe_payment_intent"
+)
+BOOKING_PROJECTIONS = {
+    "card": ("booking_uid", "house_uid", "start_date", "end_date", "status", "amount"),
+    "detail": None
+}
 
 class BookingModel(BaseModel):
     booking_uid: uuid.UUID 
@@ -19,4 +29,13 @@ class BookingCreateModel(BaseModel):
     house_uid: str
     user_uid: str
     start_date: datetime
-    end_date: datetime
\ No newline at end of file
+    end_date: datetime
+
+    @model_validator(mode="after")
+    def check_dates(self):
+        # nights are [start, end) by calendar day, pricing and the calendar count at least one
+        self.start_date = to_naive_utc(self.start_date)
+        self.end_date = to_naive_utc(self.end_date)
+        if self.end_date.date() <= self.start_date.date():
+            raise ValueError("end_date must be at least one day after start_date")
+        return self
\ No newline at end of file
@@ -1,36 +1,72 @@
 from fastapi import status, HTTPException
 from fastapi.responses import JSONResponse
-from sqlmodel import select
+from sqlmodel import select, desc
 from sqlmodel.ext.asyncio.session import AsyncSession
 from datetime import datetime, timezone, timedelta
 import uuid
-from src.booking.model import Booking
+from typing import List, Optional
+from src.booking.model import Booking, INACTIVE_BOOKING_STATUSES
+from src.booking.calendar import house_calendar
 from src.booking.schema import BookingCreateModel
-from src.db.models import House
+from src.db.models import House, User
 from src.houses.service import HouseService
+from src.houses.cache import house_cache
+from src.houses.schema import HouseModel
+from src.houses.analytics import house_analytics
 from src.auth.service import UserService
-from src.auth.utils import nights_in_between
-from src.mail.mail import mails, create_message
-from sqlalchemy import func
+from src.pricing.service import PricingService
+from src.pricing.cache import quote_cache
+from src.pagination import encode_cursor, decode_cursor
+from src.mail.outbox import mail_outbox
+from sqlalchemy import func, update, tuple_
+from sqlalchemy.orm import aliased
+from sqlalchemy.exc import IntegrityError
+from redis.exceptions import RedisError
+import logging
 
-RESERVATION_EXPIRY_MINUTE = 15
+# Stripe won't expire a checkout session sooner than 30 minutes after creating it; the hold outlives
+# the session by a few minutes so a payment made at the last moment still finds its booking pending
+CHECKOUT_EXPIRY_MINUTES = 31
+RESERVATION_EXPIRY_MINUTE = CHECKOUT_EXPIRY_MINUTES + 5
+EXPIRY_BATCH_SIZE = 500
+END_OF_STAY_BATCH_SIZE = 1000
 house_service = HouseService()
+pricing_service = PricingService()
 user_service = UserService()
 
 class BookingService:
-    async def is_house_available(self, house_uid: str, start_date: datetime, end_date: datetime, session: AsyncSession):
-        stmt = select(Booking).where(
-            (Booking.house_uid == house_uid) &
-            (
-                (Booking.start_date <= end_date) &
-                (Booking.end_date >= start_date)&
-                (House.available==True)
-            )
-        )
+    async def _has_overlap(self, house_uid: str, start_date: datetime, end_date: datetime, session: AsyncSession):
+        stmt = select(Booking.booking_uid).where(
+            Booking.house_uid == house_uid,
+            Booking.status.not_in(INACTIVE_BOOKING_STATUSES),
+            Booking.start_date < end_date,
+            Booking.end_date > start_date
+        ).limit(1)
         result = await session.exec(stmt)
-        return not result.first()
+        return result.first() is not None
+
+    async def _lock_house(self, house_uid, session: AsyncSession) -> None:
+        # bookings for the same house queue up here until the transaction ends, other houses aren't affected;
+        # hashed from the canonical uid, so every spelling of it takes the same lock
+        await session.exec(select(func.pg_advisory_xact_lock(func.hashtext(str(uuid.UUID(str(house_uid)))))))
+
+    async def is_house_available(self, house_uid: str, start_date: datetime, end_date: datetime, session: AsyncSession):
+        # the calendar answers "free" on its own; "booked" is confirmed in SQL, so a stale bit can't block a stay
+        try:
+            if await house_calendar.is_free(house_uid, start_date, end_date, session):
+                return True
+        except RedisError as e:
+            logging.error(e)
+            return not await self._has_overlap(house_uid, start_date, end_date, session)
+
+        if await self._has_overlap(house_uid, start_date, end_date, session):
+            return False
+        await house_calendar.invalidate(house_uid)
+        return True
     
     async def book_house(self, booking_data: BookingCreateModel, session: AsyncSession):
+        # rejects clashes before queueing on the per-house lock below
+        booking_data.house_uid = str(uuid.UUID(booking_data.house_uid))
         available = await self.is_house_available(
             booking_data.house_uid,
             booking_data.start_date,
@@ -39,9 +75,17 @@ class BookingService:
         )
         if not available:
             return None
+
+        await self._lock_house(booking_data.house_uid, session)
+        if await self._has_overlap(booking_data.house_uid, booking_data.start_date, booking_data.end_date, session):
+            await session.rollback()
+            return None
+
         house = await house_service.get_house_by_id(booking_data.house_uid, session)
-        nights = nights_in_between(booking_data.start_date, booking_data.end_date)
-        amount = int(nights * house.price_per_night)
+        quote = await pricing_service.quote_stay(
+            house.house_uid, house.price_per_night, booking_data.start_date, booking_data.end_date, session
+        )
+        amount = int(round(quote["total"]))
 
         expires_at = datetime.now() + timedelta(minutes=RESERVATION_EXPIRY_MINUTE)
 
@@ -51,10 +95,120 @@ class BookingService:
         new_booking.expires_at = expires_at
         session.add(new_booking)
         house.available=False
-        await session.commit()
+        try:
+            await session.commit()
+        except IntegrityError:
+            # booking_no_overlap caught a writer that went around the lock
+            await session.rollback()
+            return None
         await session.refresh(new_booking)
+        await house_cache.invalidate(house.house_uid)
+        await quote_cache.invalidate(house.house_uid)
+        await house_calendar.mark(new_booking.house_uid, new_booking.start_date, new_booking.end_date, booked=True)
         return new_booking
     
+    async def abandon_booking(self, booking: Booking, session: AsyncSession):
+        # for a booking that never got a checkout session, so the guest can simply try again
+        booking.status = "canceled"
+        booking.expires_at = None
+        await session.flush()
+        await self._reopen_houses({booking.house_uid}, session)
+        await session.commit()
+        await house_cache.invalidate(booking.house_uid)
+        await quote_cache.invalidate(booking.house_uid)
+        await house_calendar.mark(booking.house_uid, booking.start_date, booking.end_date, booked=False)
+
+    async def confirm_payment(self, booking_uid: str, payment_intent: str, session: AsyncSession):
+        # runs from the webhook inbox worker; a replay finds the booking already paid and does nothing
+        booking = await self.get_specific_booking(booking_uid, session)
+        if not booking:
+            logging.warning(f"Payment completed for unknown booking {booking_uid}")
+            return
+        if booking.status in ("paid", "refund_required"):
+            return
+
+        if booking.status != "pending":
+            # the money arrived after the hold lapsed; an expired stay is reinstated if its dates are still
+            # free, anything else (the guest canceled, the dates were rebooked) is left for a refund
+            await self._lock_house(booking.house_uid, session)
+            if booking.status != "expired" or await self._has_overlap(
+                booking.house_uid, booking.start_date, booking.end_date, session
+            ):
+                await self.flag_for_refund(booking, payment_intent, session)
+                return
+
+        house = await house_service.get_house_by_id(booking.house_uid, session)
+        booking.status = "paid"
+        booking.expires_at = None
+        booking.stripe_payment_intent = payment_intent
+        house.available = False
+        await house_analytics.record_booking(booking, session)
+        guest = await user_service.get_user_by_id(booking.user_uid, session)
+        host = await user_service.get_user_by_id(house.user_uid, session)
+        mail_outbox.queue(
+            [guest.email], "Booking Confirmation",
+            f"<h2>Your booking for house {house.title} with id {booking.house_uid} from {booking.start_date} to {booking.end_date} is confirmed.</h2>",
+            session
+        )
+        mail_outbox.queue(
+            [host.email], "Your House Was Booked",
+            f"<h2>Your house '{house.title}' was booked from {booking.start_date} to {booking.end_date}.</h2>",
+            session
+        )
+        await session.commit()
+        await house_cache.invalidate(booking.house_uid)
+        await quote_cache.invalidate(booking.house_uid)
+        await house_calendar.mark(booking.house_uid, booking.start_date, booking.end_date, booked=True)
+
+    async def flag_for_refund(self, booking: Booking, payment_intent: str, session: AsyncSession):
+        previous_status = booking.status
+        booking.status = "refund_required"
+        booking.expires_at = None
+        booking.stripe_payment_intent = payment_intent
+        guest = await user_service.get_user_by_id(booking.user_uid, session)
+        mail_outbox.queue(
+            [guest.email], "Booking Not Confirmed",
+            f"<h2>Your payment for house with id {booking.house_uid} from {booking.start_date} to {booking.end_date} arrived after the booking was no longer held, so it couldn't be confirmed. The payment will be refunded.</h2>",
+            session
+        )
+        await session.commit()
+        logging.error(
+            f"Booking {booking.booking_uid} was paid while {previous_status}, payment {payment_intent} needs a refund"
+        )
+
+    async def expire_checkout(self, booking_uid: str, session: AsyncSession):
+        # Stripe gave up on the checkout; the expiry sweeper may have got there first
+        booking = await self.get_specific_booking(booking_uid, session)
+        if not booking or booking.status != "pending":
+            return
+
+        booking.status = "expired"
+        await session.flush()
+        await self._reopen_houses({booking.house_uid}, session)
+        await self.queue_expiry_notices([booking], session)
+        await session.commit()
+        await house_cache.invalidate(booking.house_uid)
+        await quote_cache.invalidate(booking.house_uid)
+        await house_calendar.mark(booking.house_uid, booking.start_date, booking.end_date, booked=False)
+
+    async def get_quote(self, house: HouseModel, start_date: datetime, end_date: datetime, session: AsyncSession):
+        # read-only: nothing is written and no checkout is opened, so browsing dates stays cheap
+        start, end = start_date.date(), end_date.date()
+        quote, version = await quote_cache.get(house.house_uid, start, end)
+        if quote is None:
+            available = await self.is_house_available(house.house_uid, start_date, end_date, session)
+            price = await pricing_service.quote_stay(house.house_uid, house.price_per_night, start, end, session)
+            quote = {
+                "house_uid": str(house.house_uid),
+                "start_date": start.isoformat(),
+                "end_date": end.isoformat(),
+                "available": available,
+                **price
+            }
+            await quote_cache.set(house.house_uid, version, start, end, quote)
+
+        return quote
+
     async def get_specific_booking(self, booking_uid: str, session: AsyncSession):
         stmt = select(Booking).where(booking_uid==Booking.booking_uid)
 
@@ -68,16 +222,51 @@ class BookingService:
             return None
         house_uid = booking.house_uid
 
-        details = await house_service.get_house_by_id(house_uid, session)
+        details = await house_service.get_house(house_uid, session)
 
         return details
     
-    async def get_users_booking_history(self, user_uid: str, session: AsyncSession): #for users to check their booking history
-        stmt = select(Booking).where(user_uid==Booking.user_uid)
+    def _apply_history_filters(self, stmt, cursor: Optional[str], booking_status: Optional[str],
+                               date_from: Optional[datetime], date_to: Optional[datetime]):
+        if booking_status:
+            stmt = stmt.where(Booking.status == booking_status)
+        if date_from:
+            stmt = stmt.where(Booking.start_date >= date_from)
+        if date_to:
+            stmt = stmt.where(Booking.start_date < date_to)
+        if cursor:
+            start_date, booking_uid = decode_cursor(cursor)
+            stmt = stmt.where(tuple_(Booking.start_date, Booking.booking_uid) < tuple_(start_date, booking_uid))
+
+        return stmt.order_by(desc(Booking.start_date), desc(Booking.booking_uid))
+
+    def _page(self, rows, limit: int):
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].start_date, rows[-1].booking_uid)
+
+        return rows, next_cursor
+
+    async def get_users_booking_history(self, user_uid: str, session: AsyncSession, limit: int, cursor: Optional[str] = None,
+                                        fields: Optional[List[str]] = None, booking_status: Optional[str] = None,
+                                        date_from: Optional[datetime] = None, date_to: Optional[datetime] = None): #for users to check their booking history
+        # walks ix_booking_user_uid_start_date newest stay first
+        if fields:
+            columns = dict.fromkeys([*fields, "start_date", "booking_uid"])
+            stmt = select(*[getattr(Booking, column) for column in columns])
+        else:
+            stmt = select(Booking)
+        stmt = self._apply_history_filters(
+            stmt.where(user_uid==Booking.user_uid), cursor, booking_status, date_from, date_to
+        ).limit(limit + 1)
 
         result = await session.exec(stmt)
+        bookings, next_cursor = self._page(result.all(), limit)
 
-        return result.all()
+        if fields:
+            bookings = [{field: getattr(row, field) for field in fields} for row in bookings]
+        return bookings, next_cursor
     
     async def get_all_bookings(self, session: AsyncSession):
         stmt = select(Booking)
@@ -86,39 +275,63 @@ class BookingService:
 
         return result.all()
 
-    async def get_all_booking_for_house(self, house_uid: str, user_id: str, session: AsyncSession):
-        stmt = select(Booking).where(house_uid==Booking.house_uid)
-
-        result = await session.exec(stmt)
-
-        house = await house_service.get_house_by_id(house_uid, session)
-        if user_id==house.user_uid:
-
-            return result.first()
-        else:
+    async def get_all_booking_for_house(self, house_uid: str, user_id: str, session: AsyncSession, limit: int,
+                                        cursor: Optional[str] = None, booking_status: Optional[str] = None,
+                                        date_from: Optional[datetime] = None, date_to: Optional[datetime] = None):
+        house = await house_service.get_house(house_uid, session)
+        if house is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="House doesn't exist"
+            )
+        if user_id!=house.user_uid:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail={
                     "message": "You're not the owner of the house"
                 }
             )
+
+        # guest details come from the same query, walking ix_booking_house_uid_start_date_end_date
+        stmt = select(
+            Booking.booking_uid, Booking.start_date, Booking.end_date, Booking.status, Booking.amount,
+            Booking.booked_at, User.uid.label("guest_uid"), User.firstname.label("guest_firstname"),
+            User.lastname.label("guest_lastname"), User.email.label("guest_email")
+        ).join(User, User.uid == Booking.user_uid).where(Booking.house_uid == house_uid)
+        stmt = self._apply_history_filters(stmt, cursor, booking_status, date_from, date_to).limit(limit + 1)
+
+        result = await session.exec(stmt)
+        bookings, next_cursor = self._page(result.all(), limit)
+
+        return [dict(row._mapping) for row in bookings], next_cursor
+
     async def cancel_booking(self, booking_uid: str, session: AsyncSession):
         booking = await self.get_specific_booking(booking_uid, session)
-        
-        house = await house_service.get_house_by_id(booking.house_uid, session)
-        if house.available==True:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="The shortlet booking you're trying to cancel isn't booked"
-                )
-        house.available = True
-        booking.status="canceled"
-        booking.expires_at = None
-        
-        session.delete(booking)
+        if not booking:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Booking doesn't exist"
+            )
+        if booking.status in INACTIVE_BOOKING_STATUSES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"The booking is already {booking.status}"
+            )
 
-        session.refresh(booking)
+        if booking.status == "paid":
+            await house_analytics.record_booking(booking, session, sign=-1)
+        booking.status = "canceled"
+        booking.expires_at = None
+        await session.flush()
+        # the house only reopens if no other booking still holds it
+        await self._reopen_houses({booking.house_uid}, session)
         await session.commit()
+        await house_cache.invalidate(booking.house_uid)
+        await quote_cache.invalidate(booking.house_uid)
+        await house_calendar.mark(booking.house_uid, booking.start_date, booking.end_date, booked=False)
+
+        house = await house_service.get_house_by_id(booking.house_uid, session)
+        await session.refresh(house)
         return JSONResponse(
                 status_code=status.HTTP_200_OK,
                 content= {
@@ -126,12 +339,65 @@ class BookingService:
                     "House Availability": house.available
                 }
             )
-        
-    async def get_bookings_ending_at(self, date: datetime, session: AsyncSession):
-        stmt = select(Booking).where(func.date(Booking.end_date) <= date.date())
-        result = await session.exec(stmt)
-        return result.all()
-    
+
+    async def _reopen_houses(self, house_uids: set, session: AsyncSession):
+        # only houses that no other active, not yet finished booking still holds
+        still_held = select(Booking.booking_uid).where(
+            Booking.house_uid == House.house_uid,
+            Booking.status.not_in(INACTIVE_BOOKING_STATUSES),
+            Booking.ended_at.is_(None),
+            Booking.end_date > datetime.now()
+        )
+        await session.exec(
+            update(House).where(House.house_uid.in_(house_uids), ~still_held.exists()).values(available=True)
+        )
+
+    async def expire_stale_bookings(self, session: AsyncSession, batch_size: int = EXPIRY_BATCH_SIZE):
+        # one batch per transaction; SKIP LOCKED keeps concurrent sweepers and checkouts from waiting on each other
+        stale = select(Booking.booking_uid).where(
+            Booking.status == "pending",
+            Booking.expires_at < datetime.now()
+        ).order_by(Booking.expires_at).limit(batch_size).with_for_update(skip_locked=True)
+
+        result = await session.exec(
+            update(Booking).where(Booking.booking_uid.in_(stale.scalar_subquery())).values(
+                status="expired"
+            ).returning(Booking.booking_uid, Booking.house_uid, Booking.user_uid, Booking.start_date, Booking.end_date)
+        )
+        expired = result.all()
+        if not expired:
+            await session.rollback()
+            return []
+
+        house_uids = {booking.house_uid for booking in expired}
+        await self._reopen_houses(house_uids, session)
+        await self.queue_expiry_notices(expired, session)
+        await session.commit()
+
+        for house_uid in house_uids:
+            await house_cache.invalidate(house_uid)
+            await quote_cache.invalidate(house_uid)
+        for booking in expired:
+            await house_calendar.mark(booking.house_uid, booking.start_date, booking.end_date, booked=False)
+
+        return expired
+
+    async def queue_expiry_notices(self, expired: list, session: AsyncSession) -> None:
+        # into the mail outbox, in the transaction that expires the bookings
+        result = await session.exec(
+            select(User.uid, User.email).where(User.uid.in_({booking.user_uid for booking in expired}))
+        )
+        emails = dict(result.all())
+
+        for booking in expired:
+            if booking.user_uid in emails:
+                mail_outbox.queue(
+                    [emails[booking.user_uid]],
+                    "Booking Expired",
+                    f"<h2>Your booking for house with id {booking.house_uid} from {booking.start_date} to {booking.end_date} has expired. Payment wasn't completed in time.</h2>",
+                    session
+                )
+
     async def get_bookings_starting_at(self, date: datetime, session: AsyncSession):
         stmt = select(Booking).where(Booking.start_date <= date)
 
@@ -139,29 +405,53 @@ class BookingService:
 
         return result.all()    
     
-    async def end_booking(self, date: datetime, session: AsyncSession):
-        bookings = await self.get_bookings_ending_at(date, session)
-
-        for booking in bookings:
-            user = await user_service.get_user_by_id(booking.user_uid, session)
-            house = await house_service.get_house_by_id(booking.house_uid, session)
-            host = await user_service.get_user_by_id(house.user_uid, session)
-            print(house)
-            user_message = create_message(
-                recipients=[user.email],
-                subject="Your Booking Has Ended",
-                body=f"<h2>Your booking for house '{house.title}' has ended.</h2>"
+    async def end_stays(self, session: AsyncSession, batch_size: int = END_OF_STAY_BATCH_SIZE) -> int:
+        # one page of finished paid stays with everything the emails need, in a single query;
+        # SKIP LOCKED lets a second worker take the next page instead of waiting for this one
+        guest = aliased(User)
+        host = aliased(User)
+        stmt = select(
+            Booking.booking_uid, Booking.house_uid, House.title, guest.email.label("guest_email"),
+            host.email.label("host_email")
+        ).join(guest, guest.uid == Booking.user_uid).join(
+            House, House.house_uid == Booking.house_uid
+        ).join(host, host.uid == House.user_uid).where(
+            Booking.status == "paid",
+            Booking.ended_at.is_(None),
+            Booking.end_date <= datetime.now()
+        ).order_by(Booking.end_date).limit(batch_size).with_for_update(of=Booking, skip_locked=True)
+
+        result = await session.exec(stmt)
+        stays = result.all()
+        if not stays:
+            await session.rollback()
+            return 0
+
+        # the ended_at guard makes a rerun after a crash a no-op for rows that already made it
+        result = await session.exec(
+            update(Booking).where(
+                Booking.booking_uid.in_([stay.booking_uid for stay in stays]),
+                Booking.ended_at.is_(None)
+            ).values(ended_at=datetime.now()).returning(Booking.booking_uid)
+        )
+        ended = set(result.scalars().all())
+        house_uids = {stay.house_uid for stay in stays}
+        await self._reopen_houses(house_uids, session)
+        # queued with the ended_at update, so a crash can neither lose the emails nor send them twice
+        for stay in stays:
+            if stay.booking_uid not in ended:
+                continue
+            mail_outbox.queue(
+                [stay.guest_email], "Your Booking Has Ended",
+                f"<h2>Your booking for house '{stay.title}' has ended.</h2>", session
             )
-            host_message = create_message(
-                recipients=[host.email],
-                subject="The Booking of your house has Ended",
-                body=f"<h2>The booking for your house '{house.title}' has ended.</h2>"
+            mail_outbox.queue(
+                [stay.host_email], "The Booking of your house has Ended",
+                f"<h2>The booking for your house '{stay.title}' has ended.</h2>", session
             )
+        await session.commit()
 
-            await mails.send_message(user_message)
-            await mails.send_message(host_message)
+        for house_uid in house_uids:
+            await house_cache.invalidate(house_uid)
 
-            house.available = True
-            session.add(house)
-            await session.commit()
-            return date.date()
\ No newline at end of file
+        return len(stays)
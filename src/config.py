@@ -21,10 +21,15 @@ class Setting(BaseSettings):
     SUCCESS_URL: str
     CANCEL_URL: str
     STRIPE_WEBHOOK_SECRET: str
-    B2_KEY_ID: str
-    B2_APPLICATION_KEY: str
+    STRIPE_API_BASE: str = "https://api.stripe.com"
+    STORAGE_BACKEND: str = "b2"
+    B2_KEY_ID: str = ""
+    B2_APPLICATION_KEY: str = ""
     B2_BUCKET_NAME: str = "Quicklet"
-    B2_BUCKET_ID: str
+    B2_BUCKET_ID: str = ""
+    LOCAL_STORAGE_DIR: str = "media"
+    LOCAL_STORAGE_URL: str = "/media"
+    LOCAL_STORAGE_UPLOAD_URL: str = "/api/v1/storage/upload"
 
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -1,7 +1,8 @@
 from sqlmodel import SQLModel, Field, Column, Relationship
+from sqlalchemy import Index
 import sqlalchemy.dialects.postgresql as pg
 from typing import List, Optional
-from datetime import datetime
+from datetime import date, datetime
 import uuid
 
 
@@ -49,6 +50,10 @@ class User(SQLModel, table=True):
     
 class House(SQLModel, table=True):
     __tablename__="houses"
+    __table_args__ = (
+        # keyset pagination on the house listing walks this index backwards
+        Index("ix_houses_created_at_house_uid", "created_at", "house_uid"),
+    )
     house_uid: uuid.UUID = Field(
         sa_column=Column(
             pg.UUID,
@@ -65,6 +70,11 @@ class House(SQLModel, table=True):
     price_per_night: float
     description: str
     house_image_url: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+    card_image_url: Optional[str] = None
+    full_image_url: Optional[str] = None
+    # stored_images row the house's photo belongs to, released when the house is deleted
+    image_hash: Optional[str] = Field(default=None, foreign_key="stored_images.content_hash")
     available: bool
     rating: float = Field(lt=6,gt=-1, default=0, sa_column=Column(pg.FLOAT))
     user_uid: uuid.UUID = Field(
@@ -75,7 +85,16 @@ class House(SQLModel, table=True):
         sa_column=Column(
             pg.TIMESTAMP,
             nullable=False,
-        default=datetime.now()
+        default=datetime.now
+        )
+    )
+    # bumped on every ORM/Core UPDATE, drives the ETags on house reads
+    updated_at: datetime = Field(
+        sa_column=Column(
+            pg.TIMESTAMP,
+            nullable=False,
+            default=datetime.now,
+            onupdate=datetime.now
         )
     )
     user: "User" = Relationship(back_populates="houses")
@@ -86,12 +105,15 @@ class House(SQLModel, table=True):
 
 class Review(SQLModel, table=True):
     __tablename__ = "reviews"
+    __table_args__ = (
+        Index("ix_reviews_house_uid", "house_uid"),
+    )
     uid: uuid.UUID = Field(
         sa_column= Column(
             pg.UUID,
             primary_key=True,
             nullable=False,
-            default=uuid.uuid4()
+            default=uuid.uuid4
         )
     )
     review_text: str
@@ -108,18 +130,40 @@ class Review(SQLModel, table=True):
         sa_column= Column(
             pg.TIMESTAMP,
             nullable=False,
-            default=datetime.now()
+            default=datetime.now
         )
     )
     updated_at: datetime = Field(
         sa_column= Column(
             pg.TIMESTAMP,
             nullable=False,
-            default=datetime.now()
+            default=datetime.now,
+            onupdate=datetime.now
         )
     )
     user: "User" = Relationship(back_populates="reviews")
     houses: "House" = Relationship(back_populates="reviews")
 
     def __repr__(self):
-        return f"<Review for {self.house_uid} by {self.user_uid}>"
\ No newline at end of file
+        return f"<Review for {self.house_uid} by {self.user_uid}>"
+
+
+class HouseMonthlyStats(SQLModel, table=True):
+    # rollup maintained by src/houses/analytics.py; a stay's nights and revenue are split across the months they fall in
+    __tablename__ = "house_monthly_stats"
+    house_uid: uuid.UUID = Field(foreign_key="houses.house_uid", primary_key=True)
+    month: date = Field(primary_key=True)
+    booked_nights: int = Field(default=0)
+    bookings: int = Field(default=0)
+    revenue: float = Field(default=0)
+    updated_at: datetime = Field(
+        sa_column= Column(
+            pg.TIMESTAMP,
+            nullable=False,
+            default=datetime.now,
+            onupdate=datetime.now
+        )
+    )
+
+    def __repr__(self):
+        return f"<HouseMonthlyStats {self.house_uid} {self.month}>"
@@ -3,7 +3,8 @@ from src.config import Config
 
 JTI_EXPIRY = 3600
 
-token_blocklist = redis.from_url(Config.REDIS_URL)
+redis_client = redis.from_url(Config.REDIS_URL)
+token_blocklist = redis_client
 
 async def add_jti_to_blocklist(jti: str) -> None:
     await token_blocklist.set(
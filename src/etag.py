@@ -0,0 +1,19 @@
+import hashlib
+from typing import Optional
+from fastapi import Request, Response, status
+
+def make_etag(*parts) -> str:
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()
+
+    return f'"{digest}"'
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    # returns the 304 to send when the client's If-None-Match already covers etag
+    header = request.headers.get("if-none-match")
+    if not header:
+        return None
+
+    candidates = [candidate.strip().removeprefix("W/") for candidate in header.split(",")]
+    if "*" in candidates or etag in candidates:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return None
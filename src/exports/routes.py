@@ -0,0 +1,46 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from typing import Literal, Optional
+from datetime import datetime
+from src.auth.dependencies import AccessTokenBearer, RoleChecker
+from .service import ExportService
+
+export_router = APIRouter()
+export_service = ExportService()
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson"
+}
+
+def export_response(export: str, format: str, fields: Optional[str], since: Optional[datetime], until: Optional[datetime]):
+    try:
+        columns = export_service.resolve_columns(export, fields)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    return StreamingResponse(
+        export_service.stream_rows(export, columns, format, since, until),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{export}.{format}"'}
+    )
+
+@export_router.get("/houses")
+async def export_houses(format: Literal["csv", "ndjson"]= "csv", fields: Optional[str]= None,
+                        since: Optional[datetime]= None, until: Optional[datetime]= None,
+                        token_details: dict= Depends(AccessTokenBearer()), _: bool= Depends(RoleChecker(["admin"]))):
+    return export_response("houses", format, fields, since, until)
+
+@export_router.get("/bookings")
+async def export_bookings(format: Literal["csv", "ndjson"]= "csv", fields: Optional[str]= None,
+                          since: Optional[datetime]= None, until: Optional[datetime]= None,
+                          token_details: dict= Depends(AccessTokenBearer()), _: bool= Depends(RoleChecker(["admin"]))):
+    return export_response("bookings", format, fields, since, until)
+
+@export_router.get("/users")
+async def export_users(format: Literal["csv", "ndjson"]= "csv", fields: Optional[str]= None,
+                       since: Optional[datetime]= None, until: Optional[datetime]= None,
+                       token_details: dict= Depends(AccessTokenBearer()), _: bool= Depends(RoleChecker(["admin"]))):
+    return export_response("users", format, fields, since, until)
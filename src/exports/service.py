@@ -0,0 +1,72 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from typing import AsyncIterator, List, Optional
+from sqlmodel import select
+from src.db.main import async_session
+from src.db.models import House, User
+from src.booking.model import Booking
+from src.projection import resolve_projection
+
+EXPORT_BATCH_SIZE = 1000
+
+# (model, column the date filters apply to, exportable columns)
+EXPORTS = {
+    "houses": (House, "created_at", [
+        "house_uid", "title", "address", "state", "bedroom", "bathroom", "price_per_night",
+        "description", "house_image_url", "thumbnail_url", "card_image_url", "full_image_url", "available", "rating", "user_uid", "created_at", "updated_at"
+    ]),
+    "bookings": (Booking, "booked_at", [
+        "booking_uid", "house_uid", "user_uid", "start_date", "end_date", "status", "amount",
+        "booked_at", "expires_at", "ended_at", "stripe_session_id", "stripe_payment_intent"
+    ]),
+    # password hashes never leave the database
+    "users": (User, "created_at", [
+        "uid", "username", "email", "firstname", "lastname", "role", "is_verified", "created_at", "updated_at"
+    ]),
+}
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+class ExportService:
+    def resolve_columns(self, export: str, fields: Optional[str]) -> List[str]:
+        _, _, allowed = EXPORTS[export]
+
+        return resolve_projection(fields, None, {}, allowed) or allowed
+
+    async def stream_rows(self, export: str, columns: List[str], fmt: str,
+                          since: Optional[datetime] = None, until: Optional[datetime] = None) -> AsyncIterator[str]:
+        model, date_column, _ = EXPORTS[export]
+        date_attr = getattr(model, date_column)
+
+        stmt = select(*[getattr(model, column) for column in columns]).order_by(date_attr)
+        if since:
+            stmt = stmt.where(date_attr >= since)
+        if until:
+            stmt = stmt.where(date_attr < until)
+        stmt = stmt.execution_options(yield_per=EXPORT_BATCH_SIZE)
+
+        if fmt == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(columns)
+            yield buffer.getvalue()
+
+        # runs after the request's session is gone, so it owns its own session
+        async with async_session() as session:
+            result = await session.stream(stmt)
+            async for rows in result.partitions():
+                if fmt == "csv":
+                    buffer = io.StringIO()
+                    writer = csv.writer(buffer)
+                    writer.writerows(rows)
+                    yield buffer.getvalue()
+                else:
+                    yield "".join(
+                        json.dumps(dict(zip(columns, row)), default=_json_default) + "\n"
+                        for row in rows
+                    )
@@ -0,0 +1,110 @@
+import argparse
+import asyncio
+import calendar
+import json
+from datetime import date, datetime
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from src.db.models import House, HouseMonthlyStats
+from src.pricing.engine import night_range
+
+# same night semantics as the booking calendar and pricing: [start, end), at least one night
+BACKFILL_SQL = text("""
+    INSERT INTO house_monthly_stats (house_uid, month, booked_nights, bookings, revenue, updated_at)
+    SELECT b.house_uid,
+           date_trunc('month', n.night)::date,
+           count(*),
+           count(*) FILTER (WHERE n.night = b.start_date::date),
+           sum(b.amount::float8 / greatest(b.end_date::date - b.start_date::date, 1)),
+           now()
+    FROM booking b
+    CROSS JOIN LATERAL generate_series(
+        b.start_date::date, greatest(b.end_date::date, b.start_date::date + 1) - 1, interval '1 day'
+    ) AS n(night)
+    WHERE b.status = 'paid'
+    GROUP BY b.house_uid, date_trunc('month', n.night)
+""")
+
+class HouseAnalytics:
+    async def record_booking(self, booking, session: AsyncSession, sign: int = 1) -> None:
+        # +1 when a booking becomes paid, -1 when a paid one is canceled; runs in the caller's transaction
+        nights = night_range(booking.start_date.date(), booking.end_date.date())
+        months, counts = np.unique(nights.astype("datetime64[M]"), return_counts=True)
+        revenue_per_night = booking.amount / len(nights)
+
+        rows = [
+            {
+                "house_uid": booking.house_uid,
+                "month": month.item(),
+                "booked_nights": sign * int(count),
+                # a booking counts towards the month it starts in
+                "bookings": sign if i == 0 else 0,
+                "revenue": sign * revenue_per_night * int(count),
+                "updated_at": datetime.now()
+            }
+            for i, (month, count) in enumerate(zip(months, counts))
+        ]
+        stmt = insert(HouseMonthlyStats).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["house_uid", "month"],
+            set_={
+                "booked_nights": HouseMonthlyStats.booked_nights + stmt.excluded.booked_nights,
+                "bookings": HouseMonthlyStats.bookings + stmt.excluded.bookings,
+                "revenue": HouseMonthlyStats.revenue + stmt.excluded.revenue,
+                "updated_at": stmt.excluded.updated_at
+            }
+        )
+        await session.exec(stmt)
+
+    async def backfill(self, session: AsyncSession) -> int:
+        # rebuilds every rollup from the paid bookings; the lock holds off incremental updates meanwhile
+        await session.exec(text("LOCK TABLE house_monthly_stats IN EXCLUSIVE MODE"))
+        await session.exec(text("DELETE FROM house_monthly_stats"))
+        result = await session.exec(BACKFILL_SQL)
+        await session.commit()
+
+        return result.rowcount
+
+    async def get_host_stats(self, user_uid: str, start_month: date, end_month: date, session: AsyncSession):
+        # reads only the rollups, one row per house and month that had a paid night
+        stmt = select(
+            HouseMonthlyStats.house_uid, House.title, HouseMonthlyStats.month, HouseMonthlyStats.booked_nights,
+            HouseMonthlyStats.bookings, HouseMonthlyStats.revenue
+        ).join(House, House.house_uid == HouseMonthlyStats.house_uid).where(
+            House.user_uid == user_uid,
+            HouseMonthlyStats.month >= start_month,
+            HouseMonthlyStats.month <= end_month
+        ).order_by(HouseMonthlyStats.house_uid, HouseMonthlyStats.month)
+
+        result = await session.exec(stmt)
+
+        stats = []
+        for row in result.all():
+            days = calendar.monthrange(row.month.year, row.month.month)[1]
+            stats.append({
+                "house_uid": row.house_uid,
+                "title": row.title,
+                "month": row.month,
+                "booked_nights": row.booked_nights,
+                "bookings": row.bookings,
+                "revenue": round(row.revenue, 2),
+                "occupancy_rate": round(row.booked_nights / days, 4)
+            })
+        return stats
+
+house_analytics = HouseAnalytics()
+
+async def _main() -> None:
+    from src.db.main import async_session
+
+    async with async_session() as session:
+        rows = await house_analytics.backfill(session)
+    print(json.dumps({"rows": rows}))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild house_monthly_stats from the paid bookings")
+    parser.parse_args()
+    asyncio.run(_main())
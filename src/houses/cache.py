@@ -0,0 +1,98 @@
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Optional
+from redis.exceptions import RedisError
+from src.db.redis import redis_client
+
+HOUSE_CACHE_PREFIX = "house:"
+# the local tier only hears about invalidations made by this worker, keep it short-lived
+LOCAL_TTL_SECONDS = 5
+LOCAL_MAX_ENTRIES = 1024
+REDIS_TTL_SECONDS = 300
+
+def cache_key(uid) -> str:
+    # one key per house however the uid was spelled in the URL (case, hyphens), so invalidation always hits it
+    try:
+        return str(uuid.UUID(str(uid)))
+    except ValueError:
+        return str(uid)
+
+class HouseCache:
+    def __init__(self, local_ttl: float = LOCAL_TTL_SECONDS, max_entries: int = LOCAL_MAX_ENTRIES,
+                 redis_ttl: int = REDIS_TTL_SECONDS):
+        self.local_ttl = local_ttl
+        self.max_entries = max_entries
+        self.redis_ttl = redis_ttl
+        self._local: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+
+    def _get_local(self, key: str) -> Optional[dict]:
+        entry = self._local.get(key)
+        if entry is None:
+            return None
+        expires_at, data = entry
+        if expires_at < time.monotonic():
+            del self._local[key]
+            return None
+        self._local.move_to_end(key)
+        return data
+
+    def _set_local(self, key: str, data: dict) -> None:
+        self._local[key] = (time.monotonic() + self.local_ttl, data)
+        self._local.move_to_end(key)
+        while len(self._local) > self.max_entries:
+            self._local.popitem(last=False)
+
+    async def get(self, uid) -> Optional[dict]:
+        key = cache_key(uid)
+        data = self._get_local(key)
+        if data is not None:
+            self.local_hits += 1
+            return data
+
+        try:
+            raw = await redis_client.get(HOUSE_CACHE_PREFIX + key)
+        except RedisError as e:
+            logging.error(e)
+            raw = None
+        if raw is not None:
+            self.redis_hits += 1
+            data = json.loads(raw)
+            self._set_local(key, data)
+            return data
+
+        self.misses += 1
+        return None
+
+    async def set(self, uid, data: dict) -> None:
+        key = cache_key(uid)
+        self._set_local(key, data)
+        try:
+            await redis_client.set(HOUSE_CACHE_PREFIX + key, json.dumps(data), ex=self.redis_ttl)
+        except RedisError as e:
+            logging.error(e)
+
+    async def invalidate(self, uid) -> None:
+        key = cache_key(uid)
+        self._local.pop(key, None)
+        try:
+            await redis_client.delete(HOUSE_CACHE_PREFIX + key)
+        except RedisError as e:
+            logging.error(e)
+
+    def stats(self) -> dict:
+        lookups = self.local_hits + self.redis_hits + self.misses
+        return {
+            "local_hits": self.local_hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "hit_ratio": (self.local_hits + self.redis_hits) / lookups if lookups else 0.0,
+            "local_entries": len(self._local)
+        }
+
+house_cache = HouseCache()
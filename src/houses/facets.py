@@ -0,0 +1,62 @@
+import hashlib
+import json
+import logging
+from typing import Optional
+from redis.exceptions import RedisError
+from sqlalchemy import case
+from src.db.models import House
+from src.db.redis import redis_client
+
+FACETS = ("state", "bedroom", "bathroom", "price")
+FACET_CACHE_PREFIX = "facets:"
+FACET_CACHE_TTL = 60
+# nightly price band edges, in the booking currency
+PRICE_BAND_EDGES = (20000, 50000, 100000, 200000)
+
+def bedroom_bucket():
+    return case(
+        (House.bedroom <= 1, "1"),
+        (House.bedroom == 2, "2"),
+        (House.bedroom == 3, "3"),
+        else_="4+"
+    )
+
+def bathroom_bucket():
+    return case(
+        (House.bathroom <= 1, "1"),
+        (House.bathroom == 2, "2"),
+        else_="3+"
+    )
+
+def price_band():
+    whens = []
+    lower = 0
+    for edge in PRICE_BAND_EDGES:
+        whens.append((House.price_per_night < edge, f"{lower}-{edge}"))
+        lower = edge
+    return case(*whens, else_=f"{lower}+")
+
+def facet_cache_key(values: dict) -> str:
+    normalized = {
+        k: v.strip().lower() if isinstance(v, str) else v
+        for k, v in values.items()
+        if v not in (None, "")
+    }
+    digest = hashlib.sha1(json.dumps(normalized, sort_keys=True, default=str).encode()).hexdigest()
+
+    return FACET_CACHE_PREFIX + digest
+
+async def get_cached_facets(key: str) -> Optional[dict]:
+    try:
+        raw = await redis_client.get(key)
+    except RedisError as e:
+        logging.error(e)
+        return None
+
+    return json.loads(raw) if raw is not None else None
+
+async def cache_facets(key: str, facets: dict) -> None:
+    try:
+        await redis_client.set(key, json.dumps(facets), ex=FACET_CACHE_TTL)
+    except RedisError as e:
+        logging.error(e)
@@ -0,0 +1,104 @@
+import argparse
+import asyncio
+import csv
+import io
+import json
+import time
+import uuid
+from datetime import datetime
+from typing import IO, Iterable, Iterator, Tuple, Union
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlmodel.ext.asyncio.session import AsyncSession
+from src.db.models import House
+from src.houses.schema import HouseCreateModel
+
+IMPORT_BATCH_SIZE = 500
+IMPORT_FORMATS = ("csv", "jsonl")
+
+def parse_rows(stream: IO[str], fmt: str) -> Iterator[Tuple[int, Union[dict, str]]]:
+    # yields (row number, parsed row) or (row number, parse error message)
+    if fmt == "csv":
+        for row_number, row in enumerate(csv.DictReader(stream), start=1):
+            yield row_number, {k: v for k, v in row.items() if k is not None}
+        return
+
+    for row_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield row_number, f"Invalid JSON: {e.msg}"
+            continue
+        yield row_number, row if isinstance(row, dict) else "Expected a JSON object"
+
+class HouseImporter:
+    async def _flush(self, batch: list, session: AsyncSession) -> int:
+        if batch:
+            # one multi-row INSERT per batch (insertmanyvalues), all inside the caller's transaction
+            await session.exec(insert(House), params=batch)
+        return len(batch)
+
+    async def import_rows(self, rows: Iterable[Tuple[int, Union[dict, str]]], user_uid: str, session: AsyncSession) -> dict:
+        started = time.perf_counter()
+        errors = []
+        batch = []
+        inserted = 0
+        now = datetime.now()
+
+        for row_number, row in rows:
+            if isinstance(row, str):
+                errors.append({"row": row_number, "errors": [row]})
+                continue
+            try:
+                house = HouseCreateModel.model_validate(row)
+            except ValidationError as e:
+                errors.append({
+                    "row": row_number,
+                    "errors": [f"{'.'.join(str(loc) for loc in err['loc'])}: {err['msg']}" for err in e.errors()]
+                })
+                continue
+
+            batch.append({
+                **house.model_dump(),
+                "house_uid": uuid.uuid4(),
+                "user_uid": user_uid,
+                "rating": 0,
+                "created_at": now
+            })
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                inserted += await self._flush(batch, session)
+                batch = []
+
+        inserted += await self._flush(batch, session)
+        await session.commit()
+
+        elapsed = time.perf_counter() - started
+        return {
+            "inserted": inserted,
+            "failed": len(errors),
+            "errors": errors,
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_second": round(inserted / elapsed, 1) if elapsed else None
+        }
+
+async def _main(path: str, user_uid: str, fmt: str) -> None:
+    from src.db.main import async_session
+
+    with open(path, encoding="utf-8", newline="") as stream:
+        async with async_session() as session:
+            report = await HouseImporter().import_rows(parse_rows(stream, fmt), user_uid, session)
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import houses from a CSV or JSONL file")
+    parser.add_argument("path")
+    parser.add_argument("--host-uid", required=True, help="uid of the host the houses belong to")
+    parser.add_argument("--format", choices=IMPORT_FORMATS, help="defaults to the file extension")
+    args = parser.parse_args()
+
+    fmt = args.format or args.path.rsplit(".", 1)[-1].lower()
+    if fmt not in IMPORT_FORMATS:
+        parser.error("could not infer the format, pass --format")
+    asyncio.run(_main(args.path, args.host_uid, fmt))
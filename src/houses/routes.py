@@ -1,54 +1,301 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, Query, Request, Response, Form, BackgroundTasks
+from fastapi.responses import StreamingResponse
 from sqlmodel.ext.asyncio.session import AsyncSession
-import tempfile
-import aiofiles
+from typing import List, Optional, Literal
+import io
+from datetime import date, datetime, time, timedelta
 from src.auth.dependencies import AccessTokenBearer, RoleChecker, get_current_user
-from src.houses.schema import HouseCreateModel, HouseUpdateModel
+from src.houses.schema import HouseCreateModel, HouseUpdateModel, ImageUploadRequest, HOUSE_FIELDS, HOUSE_PROJECTIONS
 from src.db.main import get_session
 from src.houses.service import HouseService
-from src.b2 import b2_upload_file
+from src.houses.importer import HouseImporter, parse_rows, IMPORT_FORMATS
+from src.houses.cache import house_cache
+from src.booking.calendar import house_calendar, MAX_CALENDAR_DAYS
+from src.images.service import ImageService
+from src.images.variants import MAX_IMAGE_BYTES
+from src.storage import get_storage, is_upload_key_of, upload_key_prefix
+from PIL import UnidentifiedImageError
+from pathlib import PurePosixPath
+import uuid
+from src.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from src.projection import resolve_projection
+from src.etag import make_etag, not_modified
+from src.pricing.service import PricingService
+from src.houses.analytics import house_analytics
+from src.pricing.schema import RateRuleCreateModel
 
 
 house_router = APIRouter()
 house_service = HouseService()
-CHUNK_SIZE = 1024*1024
+house_importer = HouseImporter()
+image_service = ImageService()
+pricing_service = PricingService()
+
+def house_fields(fields: Optional[str]= None, projection: Optional[Literal["card", "detail"]]= None) -> Optional[List[str]]:
+    try:
+        return resolve_projection(fields, projection, HOUSE_PROJECTIONS, HOUSE_FIELDS)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
 
 @house_router.get("/")
-async def get_houses(session: AsyncSession= Depends(get_session), token: str= Depends(AccessTokenBearer())):
-    houses = await house_service.get_all_houses(session)
+async def get_houses(request: Request, response: Response,
+                     limit: int= Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), cursor: Optional[str]= None,
+                     stream: bool= False, fields: Optional[List[str]]= Depends(house_fields),
+                     session: AsyncSession= Depends(get_session), token: str= Depends(AccessTokenBearer())):
+    if stream:
+        return StreamingResponse(house_service.stream_houses(), media_type="application/x-ndjson")
+
+    try:
+        # narrow version read of the same page, so an unchanged page costs no full fetch or serialization
+        versions, version_cursor = await house_service.get_houses_page(
+            session, limit, cursor, ["house_uid", "updated_at"], with_covers=False
+        )
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    etag = make_etag(limit, cursor, fields, version_cursor, *[(v["house_uid"], v["updated_at"]) for v in versions])
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+
+    houses, next_cursor = await house_service.get_houses_page(session, limit, cursor, fields)
+    response.headers["ETag"] = etag
+
+    return {
+        "houses": houses,
+        "next_cursor": next_cursor
+    }
+
+@house_router.get("/cache/stats")
+async def get_house_cache_stats(token: dict= Depends(AccessTokenBearer()), _: bool= Depends(RoleChecker(["admin"]))):
+    return house_cache.stats()
+
+@house_router.get("/analytics")
+async def get_house_analytics(start: Optional[date]= Query(None, alias="from"), end: Optional[date]= Query(None, alias="to"),
+                              session: AsyncSession= Depends(get_session), token_details: dict= Depends(AccessTokenBearer()),
+                              _: bool= Depends(RoleChecker(["host", "admin"]))):
+    # months are compared by their first day; defaults to the last twelve months
+    today = date.today()
+    end_month = (end or today).replace(day=1)
+    # end_month and the eleven before it
+    first_month = end_month.year * 12 + end_month.month - 12
+    start_month = (start or date(first_month // 12, first_month % 12 + 1, 1)).replace(day=1)
+    if end_month < start_month:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="'to' must not be before 'from'"
+        )
+
+    user_uid = token_details.get("user")["id"]
+
+    return await house_analytics.get_host_stats(user_uid, start_month, end_month, session)
 
-    return houses
+@house_router.get("/mine/dashboard")
+async def get_host_dashboard(session: AsyncSession= Depends(get_session), token_details: dict= Depends(AccessTokenBearer()),
+                             _: bool= Depends(RoleChecker(["host", "admin"]))):
+    user_uid = token_details.get("user")["id"]
+    houses = await house_service.get_host_dashboard(user_uid, session)
+
+    return {
+        "houses": houses
+    }
 
 @house_router.get("/{uid}")
-async def get_particular_house_by_uid(uid: str, session: AsyncSession= Depends(get_session),
+async def get_particular_house_by_uid(uid: str, request: Request, response: Response, session: AsyncSession= Depends(get_session),
                                        token: dict= Depends(AccessTokenBearer())):
-    house = await house_service.get_house_by_id(uid, session)
+    house = await house_service.get_house(uid, session)
+    if house is not None:
+        etag = make_etag(house.house_uid, house.updated_at)
+        cached = not_modified(request, etag)
+        if cached:
+            return cached
+        response.headers["ETag"] = etag
 
     return house
 
+@house_router.get("/{uid}/calendar")
+async def get_house_calendar(uid: str, start: date= Query(alias="from"), end: date= Query(alias="to"),
+                             session: AsyncSession= Depends(get_session), token: dict= Depends(AccessTokenBearer())):
+    if end < start or (end - start).days >= MAX_CALENDAR_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"'to' must be on or after 'from' and at most {MAX_CALENDAR_DAYS} days later"
+        )
+    house_uid = parse_uid(uid, "House doesn't exist")
+    if not await house_service.house_exists_by_uid(house_uid, session):
+        raise HTTPException(
+            status_code= status.HTTP_404_NOT_FOUND,
+            detail= "House doesn't exist"
+        )
+
+    days = await house_calendar.get_days(house_uid, start, end, session)
+
+    return {
+        "house_uid": house_uid,
+        "from": start,
+        "to": end,
+        "days": [
+            {"date": start + timedelta(days=i), "booked": booked}
+            for i, booked in enumerate(days)
+        ]
+    }
+
+def parse_uid(value: str, detail: str) -> uuid.UUID:
+    # a malformed id can't name anything, answer it like an unknown one instead of failing in the query
+    try:
+        return uuid.UUID(value)
+    except ValueError:
+        raise HTTPException(
+            status_code= status.HTTP_404_NOT_FOUND,
+            detail= detail
+        )
+
+async def get_owned_house(house_uid: str, token_details: dict, session: AsyncSession):
+    house = await house_service.get_house_by_id(parse_uid(house_uid, "House doesn't exist"), session)
+    if house is None:
+        raise HTTPException(
+            status_code= status.HTTP_404_NOT_FOUND,
+            detail= "House doesn't exist"
+        )
+    user = token_details.get("user")
+    if user["role"] != "admin" and str(house.user_uid) != user["id"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You can only manage your own houses"
+        )
+    return house
+
+@house_router.get("/{house_uid}/images")
+async def get_house_images(house_uid: str, session: AsyncSession= Depends(get_session),
+                           token: dict= Depends(AccessTokenBearer())):
+    if not await house_service.house_exists_by_uid(house_uid, session):
+        raise HTTPException(
+            status_code= status.HTTP_404_NOT_FOUND,
+            detail= "House doesn't exist"
+        )
+
+    return await house_service.get_house_images(house_uid, session)
+
+@house_router.post("/{house_uid}/images")
+async def upload_house_images(house_uid: str, files: List[UploadFile], session: AsyncSession= Depends(get_session),
+                              token_details: dict= Depends(AccessTokenBearer()),
+                              _: bool= Depends(RoleChecker(["host", "admin"]))):
+    house = await get_owned_house(house_uid, token_details, session)
+
+    try:
+        return await house_service.add_house_images(house, files, session)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except UnidentifiedImageError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="One of the uploaded files is not a supported image"
+        )
+
+@house_router.get("/{house_uid}/rates")
+async def get_house_rates(house_uid: str, session: AsyncSession= Depends(get_session),
+                          token: dict= Depends(AccessTokenBearer())):
+    # the rules come back keyed by UUID, so look them up with one rather than the path string
+    house_uid = parse_uid(house_uid, "House doesn't exist")
+    if not await house_service.house_exists_by_uid(house_uid, session):
+        raise HTTPException(
+            status_code= status.HTTP_404_NOT_FOUND,
+            detail= "House doesn't exist"
+        )
+
+    return await pricing_service.get_house_rules(house_uid, session)
+
+@house_router.post("/{house_uid}/rates", status_code=status.HTTP_201_CREATED)
+async def add_house_rate(house_uid: str, rule: RateRuleCreateModel, session: AsyncSession= Depends(get_session),
+                         token_details: dict= Depends(AccessTokenBearer()), _: bool= Depends(RoleChecker(["host", "admin"]))):
+    house = await get_owned_house(house_uid, token_details, session)
+
+    return await pricing_service.add_rule(house.house_uid, rule, session)
+
+@house_router.delete("/{house_uid}/rates/{rule_uid}")
+async def delete_house_rate(house_uid: str, rule_uid: str, session: AsyncSession= Depends(get_session),
+                            token_details: dict= Depends(AccessTokenBearer()), _: bool= Depends(RoleChecker(["host", "admin"]))):
+    house = await get_owned_house(house_uid, token_details, session)
+    rule = await pricing_service.delete_rule(house.house_uid, parse_uid(rule_uid, "Rate rule doesn't exist"), session)
+    if rule is None:
+        raise HTTPException(
+            status_code= status.HTTP_404_NOT_FOUND,
+            detail= "Rate rule doesn't exist"
+        )
+
+    return rule
+
 @house_router.get("/{address}")
 async def get_particular_house_by_address(address: str, session: AsyncSession= Depends(get_session),
                                            token: dict= Depends(AccessTokenBearer())):
     house = await house_service.get_house_by_address(address, session)
 
     return house
-#### need to do the aws or b2 side
+@house_router.post("/upload-url")
+async def create_image_upload_url(upload: ImageUploadRequest, token_details: dict= Depends(AccessTokenBearer()),
+                                  _: bool= Depends(RoleChecker(["host", "admin"]))):
+    if not upload.content_type.startswith("image/"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Only images can be uploaded"
+        )
+
+    user_uid = token_details.get("user")["id"]
+    extension = PurePosixPath(upload.filename).suffix.lower()
+    key = f"{upload_key_prefix(user_uid)}{uuid.uuid4().hex}{extension}"
+
+    return await get_storage().create_upload_target(key, upload.content_type)
+
 @house_router.post("/create")
-async def create_house(file: UploadFile, house_model: HouseCreateModel= Depends(HouseCreateModel.as_form),
+async def create_house(background_tasks: BackgroundTasks, file: Optional[UploadFile]= None, image_key: Optional[str]= Form(None),
+                        house_model: HouseCreateModel= Depends(HouseCreateModel.as_form),
                         session: AsyncSession= Depends(get_session), token_details: dict= Depends(AccessTokenBearer()),
                           _: bool= Depends(RoleChecker(["host", "admin"]))):
+    if (file is None) == (image_key is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Send either an image file or the image_key of a direct upload"
+        )
+    user_uid = token_details.get("user")["id"]
+
     try: 
-        filename = tempfile.mktemp()
-        async with aiofiles.open(filename, "wb") as f:
-            while chunk:= await file.read(CHUNK_SIZE):
-                await f.write(chunk)
-        file_url = b2_upload_file(filename, file.filename)
-        house_model.house_image_url = file_url
+        image_hash = None
+        if file is not None:
+            stored = await image_service.store_upload(file, session)
+            image_hash = stored.pop("image_hash")
+            image_urls = {"house_image_url": stored.pop("original_url"), **stored}
+        else:
+            # direct uploads only need their key recorded, the bytes never pass through the API
+            storage = get_storage()
+            size = await storage.get_size(image_key) if is_upload_key_of(image_key, user_uid) else None
+            if size is None:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Unknown image_key"
+                )
+            if size > MAX_IMAGE_BYTES:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=f"Images must be at most {MAX_IMAGE_BYTES // (1024 * 1024)} MB"
+                )
+            image_urls = {"house_image_url": storage.url_for(image_key)}
 
-        user_uid = token_details.get("user")["id"]
-        house = await house_service.add_house(house_model,user_uid, session)
+        for column, url in image_urls.items():
+            setattr(house_model, column, url)
+
+        house = await house_service.add_house(house_model,user_uid, session, image_hash)
 
         if house is not None:
+            if image_key is not None:
+                background_tasks.add_task(house_service.attach_image_variants, house.house_uid, image_key)
             return house
         
         else:
@@ -57,26 +304,89 @@ async def create_house(file: UploadFile, house_model: HouseCreateModel= Depends(
                 detail = "Something went wrong"
             )
 
+    except HTTPException:
+        raise
+    except UnidentifiedImageError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="The uploaded file is not a supported image"
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"There was an error loading the file, {e}"
         )
     
-@house_router.post("/search-house")
-async def search(    address: str | None = None,
+def search_values(    q: str | None = None,
+    address: str | None = None,
     price_min: float | None = None,
     price_max: float | None = None,
     state: str | None = None,
     bedroom: int | None = None,
     bathroom: int | None = None,
+    check_in: date | None = None,
+    check_out: date | None = None) -> dict:
+
+    if (check_in is None) != (check_out is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="check_in and check_out must be provided together"
+        )
+    if check_in and check_out <= check_in:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="check_out must be after check_in"
+        )
+
+    return { "q": q, "address": address, "price_min": price_min, "price_max": price_max, "state": state, "bedroom": bedroom, "bathroom": bathroom,
+              "check_in": datetime.combine(check_in, time.min) if check_in else None,
+              "check_out": datetime.combine(check_out, time.min) if check_out else None }
+
+@house_router.post("/import")
+async def import_houses(file: UploadFile, format: Optional[Literal["csv", "jsonl"]]= None,
+                        session: AsyncSession= Depends(get_session), token_details: dict= Depends(AccessTokenBearer()),
+                        _: bool= Depends(RoleChecker(["host", "admin"]))):
+    fmt = format or (file.filename or "").rsplit(".", 1)[-1].lower()
+    if fmt not in IMPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Could not infer the file format, pass format=csv or format=jsonl"
+        )
+
+    user_uid = token_details.get("user")["id"]
+    stream = io.TextIOWrapper(file.file, encoding="utf-8", newline="")
+    try:
+        report = await house_importer.import_rows(parse_rows(stream, fmt), user_uid, session)
+    except UnicodeDecodeError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="File must be UTF-8 encoded"
+        )
+    finally:
+        stream.detach()
+
+    return report
+
+@house_router.post("/search-house")
+async def search(values: dict= Depends(search_values),
+    page: int = Query(1, ge=1),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[List[str]]= Depends(house_fields),
 
     session: AsyncSession= Depends(get_session), token_details: dict= Depends(AccessTokenBearer())):
 
-    values = { "address": address, "price_min": price_min, "price_max": price_max, "state": state, "bedroom": bedroom, "bathroom": bathroom }
-    stmt = await house_service.search_houses(values, session)
+    houses, has_more = await house_service.search_houses(values, session, limit, (page - 1) * limit, fields)
     
-    return stmt
+    return {
+        "houses": houses,
+        "next_page": page + 1 if has_more else None
+    }
+
+@house_router.post("/search-house/facets")
+async def search_facets(values: dict= Depends(search_values),
+    session: AsyncSession= Depends(get_session), token_details: dict= Depends(AccessTokenBearer())):
+
+    return await house_service.get_search_facets(values, session)
 
 @house_router.post("/update/{house_uid}")
 async def update_house(house_uid: str, house_model: HouseUpdateModel, session: AsyncSession= Depends(get_session),
@@ -4,6 +4,17 @@ from typing import Optional
 from fastapi import Form
 import uuid
 
+HOUSE_FIELDS = (
+    "house_uid", "title", "address", "state", "bedroom", "bathroom", "price_per_night",
+    "description", "house_image_url", "thumbnail_url", "card_image_url", "full_image_url",
+    "available", "rating", "user_uid", "created_at", "updated_at"
+)
+# named column sets for ?projection=, None selects the full row
+HOUSE_PROJECTIONS = {
+    "card": ("house_uid", "title", "price_per_night", "state", "rating", "card_image_url"),
+    "detail": None
+}
+
 class HouseModel(BaseModel):
     house_uid: uuid.UUID
     title: str
@@ -13,9 +24,15 @@ class HouseModel(BaseModel):
     bathroom: int
     price_per_night: float
     description: str
+    house_image_url: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+    card_image_url: Optional[str] = None
+    full_image_url: Optional[str] = None
     available: bool = True
+    rating: float = 0
     user_uid: uuid.UUID
     created_at: datetime
+    updated_at: Optional[datetime] = None
 
 class HouseCreateModel(BaseModel):
     title: str
@@ -27,6 +44,9 @@ class HouseCreateModel(BaseModel):
     description: str
     available: bool
     house_image_url: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+    card_image_url: Optional[str] = None
+    full_image_url: Optional[str] = None
 
     @classmethod
     def as_form(
@@ -51,6 +71,10 @@ class HouseCreateModel(BaseModel):
             available=available
         )
 
+class ImageUploadRequest(BaseModel):
+    filename: str
+    content_type: str
+
 class HouseUpdateModel(BaseModel):
     title: Optional[str]
     address: Optional[str]
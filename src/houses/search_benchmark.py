@@ -0,0 +1,114 @@
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+from src.houses.service import HOUSE_SEARCH_DOCUMENT
+
+# everything lives in a scratch schema, the real houses table is never touched
+BENCH_SCHEMA = "search_benchmark"
+STREETS = ("Allen Avenue", "Admiralty Way", "Bourdillon Road", "Awolowo Road", "Adeola Odeku Street")
+AREAS = ("Ikeja", "Lekki", "Ikoyi", "Victoria Island", "Yaba")
+STATES = ("Lagos", "Abuja", "Oyo", "Rivers", "Kano", "Enugu")
+
+def _sql_array(values) -> str:
+    return "ARRAY[" + ", ".join(f"'{value}'" for value in values) + "]"
+
+SEED_SQL = f"""
+    INSERT INTO houses (title, description, address, state)
+    SELECT 'House ' || i,
+           'Cozy ' || ({_sql_array(("beach", "mountain", "city", "lake", "garden"))})[1 + i % 5]
+               || ' apartment with ' || (1 + i % 6) || ' bedrooms',
+           i || ' ' || ({_sql_array(STREETS)})[1 + i % {len(STREETS)}]
+               || ', ' || ({_sql_array(AREAS)})[1 + i % {len(AREAS)}],
+           ({_sql_array(STATES)})[1 + i % {len(STATES)}]
+    FROM generate_series(1, :rows) AS i
+"""
+
+# the same shapes HouseService.search_houses sends: the old ILIKE filter, and ranked full-text search
+ILIKE_QUERY = text("""
+    SELECT house_uid FROM houses
+    WHERE address ILIKE :address OR state ILIKE :state
+    ORDER BY created_at DESC, house_uid DESC LIMIT 20
+""")
+FTS_QUERY = text(f"""
+    SELECT house_uid FROM houses
+    WHERE {HOUSE_SEARCH_DOCUMENT} @@ websearch_to_tsquery('english'::regconfig, :q)
+    ORDER BY ts_rank_cd({HOUSE_SEARCH_DOCUMENT}, websearch_to_tsquery('english'::regconfig, :q)) DESC,
+             created_at DESC, house_uid DESC
+    LIMIT 20
+""")
+
+async def _time(conn: AsyncConnection, query, params: dict, repeat: int) -> dict:
+    await (await conn.execute(query, params)).fetchall()  # warm the cache
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await (await conn.execute(query, params)).fetchall()
+        timings.append((time.perf_counter() - started) * 1000)
+
+    return {"median_ms": round(statistics.median(timings), 3), "max_ms": round(max(timings), 3)}
+
+async def run_benchmark(conn: AsyncConnection, rows: int, repeat: int) -> dict:
+    await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    await conn.execute(text(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE"))
+    await conn.execute(text(f"CREATE SCHEMA {BENCH_SCHEMA}"))
+    await conn.execute(text(f"SET search_path TO {BENCH_SCHEMA}, public"))
+    await conn.execute(text("""
+        CREATE TABLE houses (
+            house_uid uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+            title text, description text, address text, state text,
+            created_at timestamp NOT NULL DEFAULT now()
+        )
+    """))
+
+    started = time.perf_counter()
+    await conn.execute(text(SEED_SQL), {"rows": rows})
+    await conn.execute(text("ANALYZE houses"))
+    seeded_in = time.perf_counter() - started
+
+    # a selective needle, so LIMIT can't stop a sequential scan early
+    ilike = {"address": f"%{rows // 2} {STREETS[(rows // 2) % len(STREETS)]}%", "state": "%no such state%"}
+    fts = {"q": f"house {rows // 2}"}
+
+    results = {"rows": rows, "seed_seconds": round(seeded_in, 2)}
+    results["ilike_without_index"] = await _time(conn, ILIKE_QUERY, ilike, repeat)
+    results["fts_without_index"] = await _time(conn, FTS_QUERY, fts, repeat)
+
+    # the indexes from migration 8c1f4e6d2b93
+    await conn.execute(text("CREATE INDEX ON houses USING gin (address gin_trgm_ops)"))
+    await conn.execute(text("CREATE INDEX ON houses USING gin (state gin_trgm_ops)"))
+    await conn.execute(text(f"CREATE INDEX ON houses USING gin (({HOUSE_SEARCH_DOCUMENT}))"))
+    await conn.execute(text("ANALYZE houses"))
+    results["ilike_trigram_index"] = await _time(conn, ILIKE_QUERY, ilike, repeat)
+    results["fts_gin_index"] = await _time(conn, FTS_QUERY, fts, repeat)
+
+    return results
+
+async def _main(rows: list, repeat: int, keep: bool) -> None:
+    from src.db.main import engine
+
+    report = []
+    async with engine.connect() as conn:
+        try:
+            for count in rows:
+                report.append(await run_benchmark(conn, count, repeat))
+        finally:
+            if not keep:
+                await conn.execute(text(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE"))
+            await conn.commit()
+    await engine.dispose()
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Time the old ILIKE house search against the trigram / full-text indexed search"
+    )
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000],
+                        help="catalog sizes to seed, one run each")
+    parser.add_argument("--repeat", type=int, default=20, help="timed runs per query")
+    parser.add_argument("--keep", action="store_true", help=f"leave the {BENCH_SCHEMA} schema in place")
+    args = parser.parse_args()
+    asyncio.run(_main(args.rows, args.repeat, args.keep))
@@ -1,15 +1,102 @@
 from sqlmodel import or_, select, desc
 from sqlmodel.ext.asyncio.session import AsyncSession
-from src.db.models import House
+from sqlalchemy import tuple_, func, literal_column, delete
+from typing import AsyncIterator, List, Optional
+from src.db.models import House, HouseMonthlyStats, Review
+from src.booking.model import Booking, INACTIVE_BOOKING_STATUSES
+from src.db.main import async_session
 from src.houses.schema import HouseModel, HouseUpdateModel
+from src.houses.cache import house_cache
+from src.pricing.cache import quote_cache
+from src.houses.facets import (FACETS, bedroom_bucket, bathroom_bucket, price_band,
+                               facet_cache_key, get_cached_facets, cache_facets)
+from src.pagination import encode_cursor, decode_cursor
+from src.images.service import ImageService
+from src.images.model import HouseImage
+from src.pricing.model import HouseRateRule
+from src.pricing.service import PricingService
+from datetime import datetime
+import logging
+
+STREAM_BATCH_SIZE = 500
+DASHBOARD_REVIEWS_PER_HOUSE = 3
+MAX_HOUSE_IMAGES = 30
+image_service = ImageService()
+pricing_service = PricingService()
+# must stay byte-for-byte identical to ix_houses_search_document so the planner can use the GIN index
+HOUSE_SEARCH_DOCUMENT = literal_column(
+    "to_tsvector('english', coalesce(houses.title, '') || ' ' || "
+    "coalesce(houses.description, '') || ' ' || coalesce(houses.address, ''))"
+)
+SEARCH_CONFIG = literal_column("'english'::regconfig")
 
 class HouseService:
-    async def get_all_houses(self, session: AsyncSession):
-        stmt = select(House).order_by(desc(House.created_at))
+    def _select(self, fields: Optional[List[str]], *required: str):
+        if not fields:
+            return select(House)
+        # required columns are selected for internal use (ordering, cursors) and dropped again by _project
+        columns = dict.fromkeys([*fields, *required])
+        return select(*[getattr(House, column) for column in columns])
+
+    def _project(self, rows, fields: Optional[List[str]]):
+        if not fields:
+            return rows
+        return [{field: getattr(row, field) for field in fields} for row in rows]
+
+    async def get_cover_images(self, house_uids: list, session: AsyncSession) -> dict:
+        # one DISTINCT ON query for a whole page instead of a lookup per house
+        if not house_uids:
+            return {}
+        stmt = select(HouseImage.house_uid, HouseImage.card_image_url, HouseImage.original_url).where(
+            HouseImage.house_uid.in_(house_uids)
+        ).distinct(HouseImage.house_uid).order_by(HouseImage.house_uid, HouseImage.position)
 
         result = await session.exec(stmt)
 
-        return result.all()
+        return {row.house_uid: row.card_image_url or row.original_url for row in result.all()}
+
+    async def _with_covers(self, rows, fields: Optional[List[str]], session: AsyncSession) -> List[dict]:
+        covers = await self.get_cover_images([row.house_uid for row in rows], session)
+        houses = [row.model_dump() for row in rows] if not fields else self._project(rows, fields)
+        for row, house in zip(rows, houses):
+            # houses created before multi-image listings only have their single card image
+            house["cover_image_url"] = covers.get(row.house_uid, getattr(row, "card_image_url", None))
+
+        return houses
+
+    async def get_houses_page(self, session: AsyncSession, limit: int, cursor: Optional[str] = None,
+                              fields: Optional[List[str]] = None, with_covers: bool = True):
+        stmt = self._select(fields, "created_at", "house_uid").order_by(
+            desc(House.created_at), desc(House.house_uid)
+        ).limit(limit + 1)
+
+        if cursor:
+            created_at, house_uid = decode_cursor(cursor)
+            stmt = stmt.where(tuple_(House.created_at, House.house_uid) < tuple_(created_at, house_uid))
+
+        result = await session.exec(stmt)
+        houses = result.all()
+
+        next_cursor = None
+        if len(houses) > limit:
+            houses = houses[:limit]
+            last = houses[-1]
+            next_cursor = encode_cursor(last.created_at, last.house_uid)
+
+        if with_covers:
+            return await self._with_covers(houses, fields, session), next_cursor
+        return self._project(houses, fields), next_cursor
+
+    async def stream_houses(self) -> AsyncIterator[str]:
+        # runs after the request's session is gone, so it owns its own session
+        stmt = select(House).order_by(desc(House.created_at), desc(House.house_uid)).execution_options(
+            yield_per=STREAM_BATCH_SIZE
+        )
+
+        async with async_session() as session:
+            result = await session.stream_scalars(stmt)
+            async for house in result:
+                yield house.model_dump_json() + "\n"
     
     async def get_house_by_address(self, address: str, session: AsyncSession):
         stmt = select(House).where(address==House.address)
@@ -24,8 +111,20 @@ class HouseService:
         result = await session.exec(stmt)
 
         return result.first()
+
+    async def get_house(self, uid: str, session: AsyncSession) -> Optional[HouseModel]:
+        # read-only, cached view of a house; use get_house_by_id when the row is going to be modified
+        data = await house_cache.get(uid)
+        if data is None:
+            house = await self.get_house_by_id(uid, session)
+            if house is None:
+                return None
+            data = house.model_dump(mode="json")
+            await house_cache.set(uid, data)
+
+        return HouseModel.model_validate(data)
     
-    async def add_house(self, house: HouseModel,user_uid: str, session: AsyncSession):
+    async def add_house(self, house: HouseModel,user_uid: str, session: AsyncSession, image_hash: Optional[str] = None):
         house_dict = house.model_dump()
 
         new_house = House(
@@ -33,11 +132,124 @@ class HouseService:
                       )
 
         new_house.user_uid = user_uid
+        new_house.image_hash = image_hash
         session.add(new_house)
         await session.commit()
 
         return new_house
     
+    async def attach_image_variants(self, house_uid, key: str):
+        # background task for direct uploads, runs after the response so it owns its own session
+        try:
+            variant_urls = await image_service.store_variants_for_key(key)
+        except Exception as e:
+            logging.exception(e)
+            return
+
+        async with async_session() as session:
+            await self.update_house_by_id(variant_urls, house_uid, session)
+    
+    async def get_house_images(self, house_uid, session: AsyncSession) -> List[HouseImage]:
+        stmt = select(HouseImage).where(HouseImage.house_uid == house_uid).order_by(HouseImage.position)
+
+        result = await session.exec(stmt)
+
+        return result.all()
+
+    async def add_house_images(self, house: House, files: list, session: AsyncSession) -> List[HouseImage]:
+        # appends after the existing images, so the first image ever uploaded stays the cover; the
+        # house row stays locked until the commit, so concurrent batches take turns picking positions
+        await session.exec(select(House.house_uid).where(House.house_uid == house.house_uid).with_for_update())
+        result = await session.exec(
+            select(func.count(), func.coalesce(func.max(HouseImage.position) + 1, 0)).where(
+                HouseImage.house_uid == house.house_uid
+            )
+        )
+        existing, start = result.one()
+        if existing + len(files) > MAX_HOUSE_IMAGES:
+            raise ValueError(f"A house can have at most {MAX_HOUSE_IMAGES} images")
+
+        stored = await image_service.store_uploads(files, session)
+
+        images = [
+            HouseImage(
+                house_uid=house.house_uid,
+                position=start + i,
+                content_hash=image.pop("image_hash"),
+                **image
+            )
+            for i, image in enumerate(stored)
+        ]
+        session.add_all(images)
+        # a new cover changes the listing cards, so bump the version their ETags are built from
+        house.updated_at = datetime.now()
+        await session.commit()
+        await house_cache.invalidate(house.house_uid)
+
+        return images
+
+    async def get_host_dashboard(self, user_uid: str, session: AsyncSession) -> List[dict]:
+        # four queries whatever the portfolio size: houses, upcoming counts, latest reviews, covers
+        result = await session.exec(
+            select(
+                House.house_uid, House.title, House.state, House.price_per_night, House.available,
+                House.rating, House.card_image_url
+            ).where(House.user_uid == user_uid).order_by(desc(House.created_at), desc(House.house_uid))
+        )
+        houses = result.all()
+        house_uids = [house.house_uid for house in houses]
+        if not house_uids:
+            return []
+
+        result = await session.exec(
+            select(Booking.house_uid, func.count()).where(
+                Booking.house_uid.in_(house_uids),
+                Booking.status.not_in(INACTIVE_BOOKING_STATUSES),
+                Booking.start_date >= datetime.now()
+            ).group_by(Booking.house_uid)
+        )
+        upcoming = dict(result.all())
+
+        # newest reviews per house via row_number, with each house's review count from the same window
+        ranked = select(
+            Review.house_uid, Review.uid, Review.review_text, Review.rating, Review.created_at,
+            func.row_number().over(partition_by=Review.house_uid, order_by=desc(Review.created_at)).label("position"),
+            func.count().over(partition_by=Review.house_uid).label("review_count")
+        ).where(Review.house_uid.in_(house_uids)).subquery()
+        result = await session.exec(
+            select(ranked).where(ranked.c.position <= DASHBOARD_REVIEWS_PER_HOUSE).order_by(
+                ranked.c.house_uid, ranked.c.position
+            )
+        )
+        reviews = {}
+        review_counts = {}
+        for review in result.all():
+            review_counts[review.house_uid] = review.review_count
+            reviews.setdefault(review.house_uid, []).append({
+                "uid": review.uid,
+                "review_text": review.review_text,
+                "rating": review.rating,
+                "created_at": review.created_at
+            })
+
+        covers = await self.get_cover_images(house_uids, session)
+
+        return [
+            {
+                "house_uid": house.house_uid,
+                "title": house.title,
+                "state": house.state,
+                "price_per_night": house.price_per_night,
+                "available": house.available,
+                "rating": house.rating,
+                "cover_image_url": covers.get(house.house_uid, house.card_image_url),
+                "upcoming_bookings": upcoming.get(house.house_uid, 0),
+                "review_count": review_counts.get(house.house_uid, 0),
+                "latest_reviews": reviews.get(house.house_uid, [])
+            }
+            for house in houses
+        ]
+
     async def house_exists(self, address: str, session: AsyncSession):
         house = await self.get_house_by_address(address, session)
 
@@ -52,8 +264,20 @@ class HouseService:
         house = await self.get_house_by_id(uid, session)
 
         if house:
-            session.delete(house)
+            images = (await session.exec(select(HouseImage).where(HouseImage.house_uid == house.house_uid))).all()
+            image_hashes = [image.content_hash for image in images]
+            if house.image_hash:
+                image_hashes.append(house.image_hash)
+            await image_service.release(image_hashes, session)
+            for image in images:
+                await session.delete(image)
+            await session.exec(delete(HouseRateRule).where(HouseRateRule.house_uid == house.house_uid))
+            await session.exec(delete(HouseMonthlyStats).where(HouseMonthlyStats.house_uid == house.house_uid))
+            # the image rows reference the house, so they have to be gone before it is
+            await session.flush()
+            await session.delete(house)
             await session.commit()
+            await house_cache.invalidate(uid)
         return house
     
     async def update_house(self, house: House, house_data: HouseUpdateModel, session: AsyncSession):
@@ -62,6 +286,8 @@ class HouseService:
             setattr(house, key, value)
 
         await session.commit()
+        await house_cache.invalidate(house.house_uid)
+        await quote_cache.invalidate(house.house_uid)
 
         return house
     
@@ -74,19 +300,34 @@ class HouseService:
 
             await session.commit()
             await session.refresh(house_to_update)
+            await house_cache.invalidate(house_uid)
+            await quote_cache.invalidate(house_uid)
         return house_data
 
-    async def search_houses(self, values: dict, session: AsyncSession):
-        query = select(House).where(House.available == True)
-
-
+    def _apply_search_filters(self, query, values: dict):
+        q = values.get("q")
         address = values.get("address")
         state = values.get("state")
         bedroom = values.get("bedroom")
         bathroom = values.get("bathroom")
         price_min = values.get("price_min")
         price_max = values.get("price_max")
+        check_in = values.get("check_in")
+        check_out = values.get("check_out")
+
+        if check_in and check_out:
+            # with dates the booking table is the source of truth, the available flag only reflects "booked right now"
+            overlapping = select(Booking.booking_uid).where(
+                Booking.house_uid == House.house_uid,
+                Booking.status.not_in(INACTIVE_BOOKING_STATUSES),
+                Booking.start_date < check_out,
+                Booking.end_date > check_in,
+            )
+            query = query.where(~overlapping.exists())
+        else:
+            query = query.where(House.available == True)
 
+        # the trigram indexes on address/state make these leading-wildcard ILIKEs index scans
         if address or state:
             query = query.where(
                 or_(
@@ -102,8 +343,72 @@ class HouseService:
             query = query.where(House.price_per_night >= price_min)
         if price_max:
             query = query.where(House.price_per_night <= price_max)
+        if q:
+            query = query.where(HOUSE_SEARCH_DOCUMENT.op("@@")(func.websearch_to_tsquery(SEARCH_CONFIG, q)))
+
+        return query
+
+    async def search_houses(self, values: dict, session: AsyncSession, limit: int, offset: int = 0,
+                            fields: Optional[List[str]] = None):
+        check_in = values.get("check_in")
+        check_out = values.get("check_out")
+        query = self._apply_search_filters(self._select(fields, "house_uid", "price_per_night"), values)
+
+        q = values.get("q")
+        if q:
+            query = query.order_by(
+                desc(func.ts_rank_cd(HOUSE_SEARCH_DOCUMENT, func.websearch_to_tsquery(SEARCH_CONFIG, q)))
+            )
+        query = query.order_by(desc(House.created_at), desc(House.house_uid)).offset(offset).limit(limit + 1)
 
         result = await session.exec(query)
         houses = result.all()
 
-        return houses
\ No newline at end of file
+        has_more = len(houses) > limit
+
+        houses = houses[:limit]
+        results = await self._with_covers(houses, fields, session)
+        if check_in and check_out:
+            # the whole page is priced in one batch against the same night range
+            quotes = await pricing_service.quote_houses(
+                {house.house_uid: house.price_per_night for house in houses}, check_in, check_out, session
+            )
+            for house, result in zip(houses, results):
+                result["total_price"] = quotes[house.house_uid]["total"]
+
+        return results, has_more
+
+    async def get_search_facets(self, values: dict, session: AsyncSession):
+        cache_key = facet_cache_key(values)
+        facets = await get_cached_facets(cache_key)
+        if facets is not None:
+            return facets
+
+        # bucket in a subquery so the outer GROUP BY only sees plain columns
+        bucketed = self._apply_search_filters(
+            select(
+                House.state.label("state"),
+                bedroom_bucket().label("bedroom"),
+                bathroom_bucket().label("bathroom"),
+                price_band().label("price")
+            ),
+            values
+        ).subquery()
+        stmt = select(
+            bucketed.c.state, bucketed.c.bedroom, bucketed.c.bathroom, bucketed.c.price, func.count()
+        ).group_by(
+            func.grouping_sets(bucketed.c.state, bucketed.c.bedroom, bucketed.c.bathroom, bucketed.c.price)
+        )
+
+        result = await session.exec(stmt)
+
+        facets = {facet: {} for facet in FACETS}
+        for row in result.all():
+            *keys, count = row
+            # each grouping set leaves every column but its own NULL
+            for facet, key in zip(FACETS, keys):
+                if key is not None:
+                    facets[facet][key] = count
+
+        await cache_facets(cache_key, facets)
+        return facets
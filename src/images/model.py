@@ -0,0 +1,54 @@
+from sqlmodel import SQLModel, Field, Column
+from sqlalchemy import Index, text
+import sqlalchemy.dialects.postgresql as pg
+from typing import Optional
+from datetime import datetime
+import uuid
+
+class StoredImage(SQLModel, table=True):
+    # one row per distinct uploaded image, shared by every house that uses it
+    __tablename__ = "stored_images"
+    __table_args__ = (
+        Index("ix_stored_images_released_at", "released_at", postgresql_where=text("released_at IS NOT NULL")),
+    )
+    content_hash: str = Field(primary_key=True, max_length=64)
+    original_key: str
+    original_url: str
+    thumbnail_url: Optional[str] = None
+    card_image_url: Optional[str] = None
+    full_image_url: Optional[str] = None
+    size_bytes: int
+    ref_count: int = Field(default=1)
+    # set when the last reference goes; the row and its objects stay until the purge job, so an
+    # upload of the same bytes in the meantime just takes a reference again
+    released_at: Optional[datetime] = Field(default=None, sa_column=Column(pg.TIMESTAMP, nullable=True))
+    created_at: datetime = Field(sa_column=Column(
+        pg.TIMESTAMP,
+        nullable=False,
+        default=datetime.now))
+
+    def __repr__(self):
+        return f"<StoredImage {self.content_hash} refs={self.ref_count}>"
+
+
+class HouseImage(SQLModel, table=True):
+    __tablename__ = "house_images"
+    __table_args__ = (
+        # position 0 is the cover; listing pages pick it per house with DISTINCT ON over this index
+        Index("ix_house_images_house_uid_position", "house_uid", "position", unique=True),
+    )
+    image_uid: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    house_uid: uuid.UUID = Field(foreign_key="houses.house_uid")
+    position: int
+    content_hash: str = Field(foreign_key="stored_images.content_hash")
+    original_url: str
+    thumbnail_url: Optional[str] = None
+    card_image_url: Optional[str] = None
+    full_image_url: Optional[str] = None
+    created_at: datetime = Field(sa_column=Column(
+        pg.TIMESTAMP,
+        nullable=False,
+        default=datetime.now))
+
+    def __repr__(self):
+        return f"<HouseImage {self.position} of {self.house_uid}>"
@@ -0,0 +1,197 @@
+import asyncio
+import hashlib
+from collections import Counter
+import logging
+from datetime import datetime, timedelta
+from pathlib import PurePosixPath
+from typing import List, Optional
+from fastapi import HTTPException, UploadFile, status
+from sqlalchemy import update, delete, case, func
+from sqlmodel import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel.ext.asyncio.session import AsyncSession
+from src.storage import get_storage
+from .model import StoredImage
+from .variants import (generate_variants, MAX_IMAGE_BYTES, VARIANT_COLUMNS,
+                       VARIANT_CONTENT_TYPE, VARIANT_EXTENSION)
+
+READ_CHUNK_SIZE = 1024 * 1024
+# images of one batch that are uploaded and rendered at the same time
+IMAGE_UPLOAD_CONCURRENCY = 4
+# how long a released image is kept around before its objects are deleted
+RELEASE_GRACE_PERIOD = timedelta(hours=1)
+PURGE_BATCH_SIZE = 100
+IMAGE_URL_COLUMNS = ("original_url", "thumbnail_url", "card_image_url", "full_image_url")
+
+def image_prefix(content_hash: str) -> str:
+    return f"images/{content_hash[:2]}/{content_hash}"
+
+class ImageService:
+    async def store_variants(self, data: bytes, prefix: str) -> dict:
+        storage = get_storage()
+        variants = await generate_variants(data)
+        urls = await asyncio.gather(*[
+            storage.save_bytes(content, f"{prefix}/{name}.{VARIANT_EXTENSION}", VARIANT_CONTENT_TYPE)
+            for name, content in variants.items()
+        ])
+
+        return {VARIANT_COLUMNS[name]: url for name, url in zip(variants, urls)}
+
+    async def _hash_file(self, file: UploadFile):
+        # one pass over the spooled upload; nothing is kept in memory
+        hasher = hashlib.sha256()
+        size = 0
+        await file.seek(0)
+        while chunk := await file.read(READ_CHUNK_SIZE):
+            size += len(chunk)
+            if size > MAX_IMAGE_BYTES:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=f"Images must be at most {MAX_IMAGE_BYTES // (1024 * 1024)} MB"
+                )
+            hasher.update(chunk)
+
+        return hasher.hexdigest(), size
+
+    async def _acquire(self, content_hash: str, session: AsyncSession, count: int = 1) -> Optional[dict]:
+        # takes `count` references on an already stored image, None when the content is new;
+        # a released image that hasn't been purged yet is simply revived
+        stmt = update(StoredImage).where(StoredImage.content_hash == content_hash).values(
+            ref_count=StoredImage.ref_count + count,
+            released_at=None
+        ).returning(*[getattr(StoredImage, column) for column in IMAGE_URL_COLUMNS])
+
+        result = await session.exec(stmt)
+        row = result.first()
+
+        return dict(row._mapping) if row else None
+
+    async def _upload(self, file: UploadFile, content_hash: str):
+        prefix = image_prefix(content_hash)
+        original_key = f"{prefix}/original{PurePosixPath(file.filename or '').suffix.lower()}"
+
+        await file.seek(0)
+        data = await file.read()
+        # stream the original off the event loop while the variants are rendered in the process pool
+        await file.seek(0)
+        original_url, variant_urls = await asyncio.gather(
+            get_storage().save_stream(file.file, original_key, file.content_type),
+            self.store_variants(data, prefix)
+        )
+
+        return original_key, {"original_url": original_url, **variant_urls}
+
+    async def _record(self, content_hash: str, original_key: str, size: int, urls: dict, count: int,
+                      session: AsyncSession) -> None:
+        # a concurrent upload of the same bytes wrote the same keys, so just count both references
+        stmt = insert(StoredImage).values(
+            content_hash=content_hash,
+            original_key=original_key,
+            size_bytes=size,
+            ref_count=count,
+            **urls
+        ).on_conflict_do_update(
+            index_elements=["content_hash"],
+            set_={"ref_count": StoredImage.ref_count + count, "released_at": None}
+        )
+        await session.exec(stmt)
+
+    async def store_uploads(self, files: List[UploadFile], session: AsyncSession,
+                            concurrency: int = IMAGE_UPLOAD_CONCURRENCY) -> List[dict]:
+        # returns, in input order, each image's urls plus its content hash; the references are
+        # committed together with whatever the caller commits next
+        hashed = [await self._hash_file(file) for file in files]
+        counts = Counter(content_hash for content_hash, _ in hashed)
+
+        # the session can't be shared between tasks, so only the storage work runs concurrently
+        urls_by_hash = {}
+        for content_hash, count in counts.items():
+            existing = await self._acquire(content_hash, session, count)
+            if existing:
+                urls_by_hash[content_hash] = existing
+
+        new_images = {}
+        for file, (content_hash, size) in zip(files, hashed):
+            if content_hash not in urls_by_hash:
+                new_images.setdefault(content_hash, (file, size))
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def upload(content_hash: str, file: UploadFile):
+            async with semaphore:
+                return await self._upload(file, content_hash)
+
+        uploaded = await asyncio.gather(*[
+            upload(content_hash, file) for content_hash, (file, _) in new_images.items()
+        ])
+        for content_hash, (original_key, urls) in zip(new_images, uploaded):
+            _, size = new_images[content_hash]
+            await self._record(content_hash, original_key, size, urls, counts[content_hash], session)
+            urls_by_hash[content_hash] = urls
+
+        return [{"image_hash": content_hash, **urls_by_hash[content_hash]} for content_hash, _ in hashed]
+
+    async def store_upload(self, file: UploadFile, session: AsyncSession) -> dict:
+        stored = await self.store_uploads([file], session)
+
+        return stored[0]
+
+    async def release(self, content_hashes: List[str], session: AsyncSession) -> None:
+        # drops one reference per hash; an image nobody uses any more is only marked released, its
+        # objects are deleted later by purge_released() under the row lock
+        for content_hash in content_hashes:
+            await session.exec(
+                update(StoredImage).where(StoredImage.content_hash == content_hash).values(
+                    ref_count=StoredImage.ref_count - 1,
+                    released_at=case(
+                        (StoredImage.ref_count <= 1, func.coalesce(StoredImage.released_at, datetime.now())),
+                        else_=None
+                    )
+                )
+            )
+
+    async def purge_released(self, session: AsyncSession, grace: timedelta = RELEASE_GRACE_PERIOD,
+                             batch_size: int = PURGE_BATCH_SIZE) -> int:
+        # the rows stay locked while their objects are deleted, so an upload of the same bytes
+        # either revives the row first (and it drops out of the WHERE) or waits and finds it gone
+        stmt = select(StoredImage.content_hash, StoredImage.original_key).where(
+            StoredImage.ref_count <= 0,
+            StoredImage.released_at < datetime.now() - grace
+        ).order_by(StoredImage.released_at).limit(batch_size).with_for_update(skip_locked=True)
+        released = (await session.exec(stmt)).all()
+        if not released:
+            await session.rollback()
+            return 0
+
+        keys = []
+        for content_hash, original_key in released:
+            prefix = image_prefix(content_hash)
+            keys.append(original_key)
+            keys.extend(f"{prefix}/{name}.{VARIANT_EXTENSION}" for name in VARIANT_COLUMNS)
+        await self.delete_objects(keys)
+
+        await session.exec(
+            delete(StoredImage).where(StoredImage.content_hash.in_([content_hash for content_hash, _ in released]))
+        )
+        await session.commit()
+
+        return len(released)
+
+    async def delete_objects(self, keys: List[str]) -> None:
+        storage = get_storage()
+        results = await asyncio.gather(*[storage.delete(key) for key in keys], return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                logging.error(result)
+
+    async def store_variants_for_key(self, key: str) -> dict:
+        # for images clients uploaded straight to storage, which nothing has size-checked yet
+        storage = get_storage()
+        size = await storage.get_size(key)
+        if size is None:
+            raise ValueError(f"No uploaded object at {key}")
+        if size > MAX_IMAGE_BYTES:
+            raise ValueError(f"{key} is {size} bytes, images must be at most {MAX_IMAGE_BYTES} bytes")
+        data = await storage.read(key)
+
+        return await self.store_variants(data, str(PurePosixPath(key).with_suffix("")))
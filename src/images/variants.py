@@ -0,0 +1,37 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+# the worker side lives outside src, see image_workers
+from image_workers import render_variants
+
+# House column each variant's URL is stored in
+VARIANT_COLUMNS = {
+    "thumbnail": "thumbnail_url",
+    "card": "card_image_url",
+    "full": "full_image_url"
+}
+VARIANT_CONTENT_TYPE = "image/webp"
+VARIANT_EXTENSION = "webp"
+MAX_IMAGE_BYTES = 20 * 1024 * 1024
+IMAGE_WORKERS = 2
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+def get_image_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # created lazily inside a threaded server; forking that can copy held locks into the children
+        _executor = ProcessPoolExecutor(max_workers=IMAGE_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _executor
+
+def shutdown_image_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+async def generate_variants(data: bytes) -> Dict[str, bytes]:
+    loop = asyncio.get_running_loop()
+
+    return await loop.run_in_executor(get_image_executor(), render_variants, data)
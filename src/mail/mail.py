@@ -1,11 +1,16 @@
 from fastapi_mail import FastMail, MessageSchema, ConnectionConfig, MessageType
 from pathlib import Path
 from typing import List
+import asyncio
+import logging
 from src.config import Config
 from src.base import BASE_DIR
 
 # BASE_DIR = Path(__file__).parent / "templates"
 
+# SMTP connections opened at once by send_messages
+MAIL_CONCURRENCY = 10
+
 mail_config = ConnectionConfig(
     MAIL_USERNAME = Config.MAIL_USERNAME,
     MAIL_PASSWORD = Config.MAIL_PASSWORD,
@@ -32,4 +37,21 @@ def create_message(recipients: List[str], subject: str, body: str):
         body=body,
         subtype=MessageType.html
     )
-    return message
\ No newline at end of file
+    return message
+
+
+async def send_messages(messages: List[MessageSchema], concurrency: int = MAIL_CONCURRENCY) -> int:
+    # one failed recipient shouldn't stop the rest of the batch; returns how many were sent
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def send(message: MessageSchema):
+        async with semaphore:
+            try:
+                await mails.send_message(message)
+                return True
+            except Exception as e:
+                logging.error(e)
+                return False
+
+    results = await asyncio.gather(*[send(message) for message in messages])
+    return sum(results)
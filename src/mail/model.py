@@ -0,0 +1,34 @@
+from sqlmodel import SQLModel, Field, Column
+from sqlalchemy import Index
+import sqlalchemy.dialects.postgresql as pg
+from typing import List, Optional
+from datetime import datetime
+import uuid
+
+class OutboundEmail(SQLModel, table=True):
+    # written in the same transaction as the change it announces, sent afterwards by the outbox drainer
+    __tablename__ = "outbound_emails"
+    __table_args__ = (
+        Index("ix_outbound_emails_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+    email_uid: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    recipients: List[str] = Field(sa_column=Column(pg.JSONB, nullable=False))
+    subject: str
+    body: str
+    # pending -> sent, or failed once it ran out of attempts
+    status: str = Field(default="pending")
+    attempts: int = Field(default=0)
+    last_error: Optional[str] = None
+    next_attempt_at: datetime = Field(sa_column=Column(
+        pg.TIMESTAMP,
+        nullable=False,
+        default=datetime.now))
+    created_at: datetime = Field(sa_column=Column(
+        pg.TIMESTAMP,
+        nullable=False,
+        default=datetime.now))
+    sent_at: Optional[datetime] = Field(sa_column=Column(
+        pg.TIMESTAMP))
+
+    def __repr__(self):
+        return f"<OutboundEmail {self.subject} to {self.recipients} {self.status}>"
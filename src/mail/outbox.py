@@ -0,0 +1,77 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import List
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import update
+from .mail import create_message, mails, MAIL_CONCURRENCY
+from .model import OutboundEmail
+
+OUTBOX_BATCH_SIZE = 100
+MAX_MAIL_ATTEMPTS = 8
+# a claimed email that isn't finished within the lease (worker died) is picked up again
+MAIL_LEASE = timedelta(minutes=5)
+
+
+def retry_delay(attempts: int) -> timedelta:
+    # 30s, 1m, 2m, ... capped at an hour
+    return timedelta(seconds=min(30 * 2 ** (attempts - 1), 3600))
+
+
+class MailOutbox:
+    def queue(self, recipients: List[str], subject: str, body: str, session: AsyncSession) -> None:
+        # nothing is sent here; the row commits or rolls back together with the caller's transaction
+        session.add(OutboundEmail(recipients=recipients, subject=subject, body=body))
+
+    async def _claim(self, session: AsyncSession, batch_size: int):
+        # the lease is committed before anything is sent, so a slow SMTP server doesn't hold row locks
+        now = datetime.now()
+        due = select(OutboundEmail.email_uid).where(
+            OutboundEmail.status == "pending",
+            OutboundEmail.next_attempt_at <= now
+        ).order_by(OutboundEmail.next_attempt_at).limit(batch_size).with_for_update(skip_locked=True)
+
+        result = await session.exec(
+            update(OutboundEmail).where(OutboundEmail.email_uid.in_(due.scalar_subquery())).values(
+                attempts=OutboundEmail.attempts + 1,
+                next_attempt_at=now + MAIL_LEASE
+            ).returning(OutboundEmail.email_uid, OutboundEmail.recipients, OutboundEmail.subject,
+                        OutboundEmail.body, OutboundEmail.attempts)
+        )
+        emails = result.all()
+        await session.commit()
+
+        return emails
+
+    async def drain(self, session: AsyncSession, batch_size: int = OUTBOX_BATCH_SIZE,
+                    concurrency: int = MAIL_CONCURRENCY) -> int:
+        emails = await self._claim(session, batch_size)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def send(email):
+            async with semaphore:
+                try:
+                    await mails.send_message(create_message(email.recipients, email.subject, email.body))
+                except Exception as e:
+                    logging.error(e)
+                    return e
+                return None
+
+        errors = await asyncio.gather(*[send(email) for email in emails])
+        for email, error in zip(emails, errors):
+            if error is None:
+                values = {"status": "sent", "sent_at": datetime.now()}
+            else:
+                values = {"last_error": str(error)[:1000]}
+                if email.attempts >= MAX_MAIL_ATTEMPTS:
+                    values["status"] = "failed"
+                else:
+                    values["next_attempt_at"] = datetime.now() + retry_delay(email.attempts)
+            await session.exec(update(OutboundEmail).where(OutboundEmail.email_uid == email.email_uid).values(**values))
+        await session.commit()
+
+        return len(emails)
+
+
+mail_outbox = MailOutbox()
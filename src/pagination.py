@@ -0,0 +1,22 @@
+import base64
+import json
+import uuid
+from datetime import datetime
+from typing import Tuple
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# cursors are opaque to clients, they just hand back whatever next_cursor we gave them
+def encode_cursor(sort_value: datetime, uid: uuid.UUID) -> str:
+    raw = json.dumps({"k": sort_value.isoformat(), "u": str(uid)})
+
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(data["k"]), uuid.UUID(data["u"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
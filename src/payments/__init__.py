@@ -0,0 +1 @@
+from .gateway import stripe_gateway, PaymentGatewayError
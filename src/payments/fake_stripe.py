@@ -0,0 +1,53 @@
+"""Stand-in for the Stripe checkout API, for local runs and load benchmarks.
+
+    uvicorn src.payments.fake_stripe:app --port 12111
+    STRIPE_API_BASE=http://localhost:12111
+
+FAKE_STRIPE_LATENCY_MS adds a fixed delay to every call, FAKE_STRIPE_FAILURE_RATE
+(0-1) makes that share of calls return 500 to exercise retries and the circuit breaker.
+"""
+import asyncio
+import os
+import random
+import uuid
+from fastapi import FastAPI, Header, Request
+from fastapi.responses import JSONResponse
+
+LATENCY = float(os.environ.get("FAKE_STRIPE_LATENCY_MS", "0")) / 1000
+FAILURE_RATE = float(os.environ.get("FAKE_STRIPE_FAILURE_RATE", "0"))
+
+app = FastAPI()
+# idempotency key -> the session returned the first time, like Stripe keeps them for 24h
+sessions = {}
+
+
+@app.post("/v1/checkout/sessions")
+async def create_checkout_session(request: Request, idempotency_key: str = Header(None)):
+    if LATENCY:
+        await asyncio.sleep(LATENCY)
+    if random.random() < FAILURE_RATE:
+        return JSONResponse(status_code=500, content={"error": {"message": "Injected failure"}})
+
+    if idempotency_key in sessions:
+        return sessions[idempotency_key]
+
+    form = await request.form()
+    session_id = f"cs_test_{uuid.uuid4().hex}"
+    checkout_session = {
+        "id": session_id,
+        "object": "checkout.session",
+        "url": f"http://localhost/checkout/{session_id}",
+        "payment_intent": f"pi_test_{uuid.uuid4().hex}",
+        "amount_total": int(form.get("line_items[0][price_data][unit_amount]", 0)),
+        "customer_email": form.get("customer_email"),
+        "metadata": {"booking_uid": form.get("metadata[booking_uid]")},
+        "status": "open"
+    }
+    if idempotency_key:
+        sessions[idempotency_key] = checkout_session
+    return checkout_session
+
+
+@app.get("/stats")
+async def stats():
+    return {"sessions": len(sessions)}
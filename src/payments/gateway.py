@@ -0,0 +1,119 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Optional
+import httpx
+from src.config import Config
+from .breaker import CircuitBreaker, CircuitOpenError
+
+STRIPE_TIMEOUT = httpx.Timeout(10.0, connect=3.0)
+STRIPE_LIMITS = httpx.Limits(max_connections=50, max_keepalive_connections=20)
+# network errors and 5xx are retried; the idempotency key makes that safe
+STRIPE_MAX_RETRIES = 2
+STRIPE_RETRY_BACKOFF = 0.25
+
+
+class PaymentGatewayError(Exception):
+    pass
+
+
+def checkout_idempotency_key(booking_uid) -> str:
+    # a retried checkout for the same booking gets the session Stripe already made
+    return f"checkout-{booking_uid}"
+
+
+def encode_form(data: dict, prefix: str = "") -> dict:
+    # Stripe's form encoding: {"a": {"b": [1]}} -> {"a[b][0]": 1}
+    form = {}
+    items = data.items() if isinstance(data, dict) else enumerate(data)
+    for key, value in items:
+        name = f"{prefix}[{key}]" if prefix else str(key)
+        if isinstance(value, (dict, list, tuple)):
+            form.update(encode_form(value, name))
+        elif value is not None:
+            form[name] = value
+    return form
+
+
+class StripeGateway:
+    def __init__(self, api_base: str, api_key: str, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.api_base = api_base.rstrip("/")
+        self.api_key = api_key
+        # tests hand in an ASGI transport to talk to src.payments.fake_stripe in-process
+        self.transport = transport
+        self.breaker = CircuitBreaker()
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # one pooled client for the process, so checkouts reuse warm TLS connections
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.api_base,
+                auth=(self.api_key, ""),
+                timeout=STRIPE_TIMEOUT,
+                limits=STRIPE_LIMITS,
+                transport=self.transport
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+
+    async def _post(self, path: str, data: dict, idempotency_key: str) -> dict:
+        try:
+            self.breaker.before_call()
+        except CircuitOpenError as e:
+            raise PaymentGatewayError(str(e)) from e
+
+        for attempt in range(STRIPE_MAX_RETRIES + 1):
+            try:
+                response = await self.client.post(
+                    path, data=encode_form(data), headers={"Idempotency-Key": idempotency_key}
+                )
+            except httpx.TransportError as e:
+                error = e
+            else:
+                if response.status_code < 500:
+                    break
+                error = PaymentGatewayError(f"Stripe returned {response.status_code}")
+            logging.warning(f"Stripe request {path} failed (attempt {attempt + 1}): {error}")
+            if attempt < STRIPE_MAX_RETRIES:
+                await asyncio.sleep(STRIPE_RETRY_BACKOFF * 2 ** attempt)
+        else:
+            self.breaker.record_failure()
+            raise PaymentGatewayError("Payment provider is unavailable, try again shortly") from error
+
+        # a 4xx means Stripe is up and rejected this request, that doesn't count against the breaker
+        self.breaker.record_success()
+        body = response.json()
+        if response.status_code >= 400:
+            raise PaymentGatewayError(body.get("error", {}).get("message", "Payment request was rejected"))
+        return body
+
+    async def create_checkout_session(self, booking_uid, amount: int, currency: str, product_name: str,
+                                      customer_email: str, expires_at: datetime) -> dict:
+        data = {
+            "payment_method_types": ["card"],
+            "line_items": [{
+                "price_data": {
+                    "currency": currency,
+                    "product_data": {"name": product_name},
+                    "unit_amount": int(amount * 100)
+                },
+                "quantity": 1
+            }],
+            "mode": "payment",
+            "success_url": f"{Config.SUCCESS_URL}?session_id={{CHECKOUT_SESSION_ID}}",
+            "cancel_url": Config.CANCEL_URL,
+            "metadata": {"booking_uid": str(booking_uid)},
+            "customer_email": customer_email,
+            # otherwise the session stays payable for Stripe's default 24 hours, long after the hold is gone
+            "expires_at": int(expires_at.timestamp())
+        }
+
+        return await self._post("/v1/checkout/sessions", data, checkout_idempotency_key(booking_uid))
+
+
+stripe_gateway = StripeGateway(Config.STRIPE_API_BASE, Config.STRIPE_SECRET_KEY)
@@ -0,0 +1,87 @@
+import logging
+from datetime import datetime, timedelta
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import update
+from sqlalchemy.dialects.postgresql import insert
+from src.booking.service import BookingService
+from .model import WebhookEvent
+
+INBOX_BATCH_SIZE = 100
+MAX_WEBHOOK_ATTEMPTS = 8
+# a claimed event that isn't finished within the lease (worker died) is picked up again
+WEBHOOK_LEASE = timedelta(minutes=5)
+HANDLED_EVENTS = ("checkout.session.completed", "checkout.session.expired")
+booking_service = BookingService()
+
+
+def retry_delay(attempts: int) -> timedelta:
+    # 30s, 1m, 2m, ... capped at an hour
+    return timedelta(seconds=min(30 * 2 ** (attempts - 1), 3600))
+
+
+class WebhookInbox:
+    async def record(self, event_id: str, event_type: str, payload: dict, session: AsyncSession) -> None:
+        if event_type not in HANDLED_EVENTS:
+            return
+        await session.exec(
+            insert(WebhookEvent).values(
+                event_id=event_id, type=event_type, payload=payload
+            ).on_conflict_do_nothing(index_elements=["event_id"])
+        )
+        await session.commit()
+
+    async def _claim(self, session: AsyncSession, batch_size: int):
+        # the lease is committed before any handler runs, so handlers are free to commit on their own
+        now = datetime.now()
+        due = select(WebhookEvent.event_id).where(
+            WebhookEvent.status == "pending",
+            WebhookEvent.next_attempt_at <= now
+        ).order_by(WebhookEvent.next_attempt_at).limit(batch_size).with_for_update(skip_locked=True)
+
+        result = await session.exec(
+            update(WebhookEvent).where(WebhookEvent.event_id.in_(due.scalar_subquery())).values(
+                attempts=WebhookEvent.attempts + 1,
+                next_attempt_at=now + WEBHOOK_LEASE
+            ).returning(WebhookEvent.event_id, WebhookEvent.type, WebhookEvent.payload, WebhookEvent.attempts)
+        )
+        events = result.all()
+        await session.commit()
+
+        return events
+
+    async def _handle(self, event_type: str, payload: dict, session: AsyncSession) -> None:
+        checkout = payload["data"]["object"]
+        booking_uid = checkout["metadata"]["booking_uid"]
+        if event_type == "checkout.session.completed":
+            await booking_service.confirm_payment(booking_uid, checkout.get("payment_intent"), session)
+        elif event_type == "checkout.session.expired":
+            await booking_service.expire_checkout(booking_uid, session)
+
+    async def _finish(self, event_id: str, values: dict, session: AsyncSession) -> None:
+        await session.exec(update(WebhookEvent).where(WebhookEvent.event_id == event_id).values(**values))
+        await session.commit()
+
+    async def drain(self, session: AsyncSession, batch_size: int = INBOX_BATCH_SIZE) -> int:
+        events = await self._claim(session, batch_size)
+
+        for event in events:
+            try:
+                await self._handle(event.type, event.payload, session)
+            except Exception as e:
+                await session.rollback()
+                logging.exception(e)
+                values = {"last_error": str(e)[:1000]}
+                if event.attempts >= MAX_WEBHOOK_ATTEMPTS:
+                    values["status"] = "failed"
+                else:
+                    values["next_attempt_at"] = datetime.now() + retry_delay(event.attempts)
+                await self._finish(event.event_id, values, session)
+                continue
+
+            await self._finish(event.event_id, {"status": "processed", "processed_at": datetime.now()}, session)
+
+        return len(events)
+
+
+webhook_inbox = WebhookInbox()
@@ -0,0 +1,32 @@
+from sqlmodel import SQLModel, Field, Column
+from sqlalchemy import Index
+import sqlalchemy.dialects.postgresql as pg
+from typing import Optional
+from datetime import datetime
+
+class WebhookEvent(SQLModel, table=True):
+    # Stripe's event id is the key, so a redelivered event is a no-op insert
+    __tablename__ = "webhook_events"
+    __table_args__ = (
+        Index("ix_webhook_events_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+    event_id: str = Field(primary_key=True)
+    type: str
+    payload: dict = Field(sa_column=Column(pg.JSONB, nullable=False))
+    # pending -> processed, or failed once it ran out of attempts
+    status: str = Field(default="pending")
+    attempts: int = Field(default=0)
+    last_error: Optional[str] = None
+    next_attempt_at: datetime = Field(sa_column=Column(
+        pg.TIMESTAMP,
+        nullable=False,
+        default=datetime.now))
+    received_at: datetime = Field(sa_column=Column(
+        pg.TIMESTAMP,
+        nullable=False,
+        default=datetime.now))
+    processed_at: Optional[datetime] = Field(sa_column=Column(
+        pg.TIMESTAMP))
+
+    def __repr__(self):
+        return f"<WebhookEvent {self.event_id} {self.type} {self.status}>"
@@ -0,0 +1,47 @@
+import json
+import logging
+from datetime import date
+from typing import Optional, Tuple
+from redis.exceptions import RedisError
+from src.db.redis import redis_client
+
+QUOTE_CACHE_PREFIX = "quote:"
+QUOTE_VERSION_PREFIX = "quote_version:"
+QUOTE_TTL_SECONDS = 60
+
+class QuoteCache:
+    # quotes are keyed by a per-house version, so invalidating is one INCR instead of a key scan;
+    # entries cached under an old version are never read again and just age out
+    def __init__(self, ttl: int = QUOTE_TTL_SECONDS):
+        self.ttl = ttl
+
+    def _key(self, uid, version: int, start: date, end: date) -> str:
+        return f"{QUOTE_CACHE_PREFIX}{uid}:{version}:{start.isoformat()}:{end.isoformat()}"
+
+    async def get(self, uid, start: date, end: date) -> Tuple[Optional[dict], Optional[int]]:
+        # returns the cached quote (or None) and the version to store a fresh one under
+        try:
+            version = int(await redis_client.get(f"{QUOTE_VERSION_PREFIX}{uid}") or 0)
+            raw = await redis_client.get(self._key(uid, version, start, end))
+        except RedisError as e:
+            logging.error(e)
+            return None, None
+
+        return (json.loads(raw) if raw is not None else None), version
+
+    async def set(self, uid, version: Optional[int], start: date, end: date, quote: dict) -> None:
+        if version is None:
+            return
+        try:
+            await redis_client.set(self._key(uid, version, start, end), json.dumps(quote, default=str), ex=self.ttl)
+        except RedisError as e:
+            logging.error(e)
+
+    async def invalidate(self, uid) -> None:
+        # call after the booking, price or rate rule change has committed
+        try:
+            await redis_client.incr(f"{QUOTE_VERSION_PREFIX}{uid}")
+        except RedisError as e:
+            logging.error(e)
+
+quote_cache = QuoteCache()
@@ -0,0 +1,62 @@
+from datetime import date
+from typing import Dict, List, Sequence
+import numpy as np
+
+# Monday is 0; a night belongs to the day it starts on
+WEEKEND_NIGHTS = (4, 5)
+
+
+def night_range(start: date, end: date) -> np.ndarray:
+    # [start, end) as datetime64 days, always at least one night like nights_in_between
+    first = np.datetime64(start, "D")
+    last = max(np.datetime64(end, "D"), first + 1)
+    return np.arange(first, last, dtype="datetime64[D]")
+
+
+def weekdays(nights: np.ndarray) -> np.ndarray:
+    # 1970-01-01 was a Thursday
+    return (nights.astype("int64") + 3) % 7
+
+
+def nightly_rates(base_prices: Sequence[float], rules: Sequence[Sequence], nights: np.ndarray) -> np.ndarray:
+    # houses x nights matrix of what each night costs before length-of-stay discounts;
+    # the only Python loops are over rules, never over nights
+    rates = np.repeat(np.asarray(base_prices, dtype=np.float64)[:, None], len(nights), axis=1)
+    weekend = np.isin(weekdays(nights), WEEKEND_NIGHTS)
+
+    for row, house_rules in enumerate(rules):
+        for rule in house_rules:
+            if rule.kind == "weekend":
+                rates[row, weekend] = rule.nightly_price
+        # seasons are applied oldest first, so the newest one wins where they overlap
+        for rule in sorted((r for r in house_rules if r.kind == "season"), key=lambda r: r.created_at):
+            in_season = (nights >= np.datetime64(rule.start_date, "D")) & (nights < np.datetime64(rule.end_date, "D"))
+            rates[row, in_season] = rule.nightly_price
+
+    return rates
+
+
+def stay_discounts(rules: Sequence[Sequence], nights: int) -> np.ndarray:
+    # best length-of-stay discount each house gives a stay this long, as a fraction
+    return np.array([
+        max((r.discount_percent for r in house_rules if r.kind == "length_of_stay" and nights >= r.min_nights), default=0.0)
+        for house_rules in rules
+    ], dtype=np.float64) / 100
+
+
+def price_stays(base_prices: Sequence[float], rules: Sequence[Sequence], start: date, end: date) -> List[Dict]:
+    nights = night_range(start, end)
+    rates = nightly_rates(base_prices, rules, nights)
+    subtotals = rates.sum(axis=1)
+    discounts = np.round(subtotals * stay_discounts(rules, len(nights)), 2)
+    totals = subtotals - discounts
+
+    return [
+        {
+            "nights": len(nights),
+            "subtotal": round(float(subtotal), 2),
+            "discount": float(discount),
+            "total": round(float(total), 2)
+        }
+        for subtotal, discount, total in zip(subtotals, discounts, totals)
+    ]
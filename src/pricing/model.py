@@ -0,0 +1,30 @@
+from sqlmodel import SQLModel, Field, Column
+from sqlalchemy import Index
+import sqlalchemy.dialects.postgresql as pg
+from typing import Optional
+from datetime import date, datetime
+import uuid
+
+class HouseRateRule(SQLModel, table=True):
+    # weekend: nightly_price on Friday and Saturday nights
+    # season: nightly_price for nights in [start_date, end_date), wins over weekend
+    # length_of_stay: discount_percent off the total for stays of at least min_nights
+    __tablename__ = "house_rate_rules"
+    __table_args__ = (
+        Index("ix_house_rate_rules_house_uid", "house_uid"),
+    )
+    rule_uid: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    house_uid: uuid.UUID = Field(foreign_key="houses.house_uid")
+    kind: str
+    nightly_price: Optional[float] = None
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    min_nights: Optional[int] = None
+    discount_percent: Optional[float] = None
+    created_at: datetime = Field(sa_column=Column(
+        pg.TIMESTAMP,
+        nullable=False,
+        default=datetime.now))
+
+    def __repr__(self):
+        return f"<HouseRateRule {self.kind} for {self.house_uid}>"
@@ -0,0 +1,21 @@
+from pydantic import BaseModel, Field, model_validator
+from typing import Literal, Optional
+from datetime import date
+
+class RateRuleCreateModel(BaseModel):
+    kind: Literal["weekend", "season", "length_of_stay"]
+    nightly_price: Optional[float] = Field(None, gt=0)
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    min_nights: Optional[int] = Field(None, ge=2)
+    discount_percent: Optional[float] = Field(None, gt=0, lt=100)
+
+    @model_validator(mode="after")
+    def check_kind_fields(self):
+        if self.kind in ("weekend", "season") and self.nightly_price is None:
+            raise ValueError(f"{self.kind} rules need a nightly_price")
+        if self.kind == "season" and (self.start_date is None or self.end_date is None or self.end_date <= self.start_date):
+            raise ValueError("season rules need a start_date before their end_date")
+        if self.kind == "length_of_stay" and (self.min_nights is None or self.discount_percent is None):
+            raise ValueError("length_of_stay rules need min_nights and discount_percent")
+        return self
@@ -0,0 +1,73 @@
+import uuid
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Dict, List, Union
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from .cache import quote_cache
+from .engine import price_stays
+from .model import HouseRateRule
+from .schema import RateRuleCreateModel
+
+
+def as_date(value: Union[date, datetime]) -> date:
+    return value.date() if isinstance(value, datetime) else value
+
+
+class PricingService:
+    async def get_rules(self, house_uids: list, session: AsyncSession) -> Dict:
+        # every rule for a page of houses in one query
+        stmt = select(HouseRateRule).where(HouseRateRule.house_uid.in_(house_uids)).order_by(HouseRateRule.created_at)
+
+        result = await session.exec(stmt)
+
+        rules = defaultdict(list)
+        for rule in result.all():
+            rules[rule.house_uid].append(rule)
+        return rules
+
+    async def quote_houses(self, base_prices: Dict, start: Union[date, datetime], end: Union[date, datetime],
+                           session: AsyncSession) -> Dict:
+        # base_prices maps house_uid -> price_per_night; returns house_uid -> quote
+        if not base_prices:
+            return {}
+        house_uids = list(base_prices)
+        rules = await self.get_rules(house_uids, session)
+        quotes = price_stays(
+            [base_prices[uid] for uid in house_uids], [rules[uid] for uid in house_uids], as_date(start), as_date(end)
+        )
+
+        return dict(zip(house_uids, quotes))
+
+    async def quote_stay(self, house_uid, price_per_night: float, start: Union[date, datetime],
+                         end: Union[date, datetime], session: AsyncSession) -> dict:
+        quotes = await self.quote_houses({house_uid: price_per_night}, start, end, session)
+
+        return quotes[house_uid]
+
+    async def get_house_rules(self, house_uid, session: AsyncSession) -> List[HouseRateRule]:
+        # get_rules keys by the rows' UUIDs, a string uid would never find its entry
+        house_uid = uuid.UUID(str(house_uid))
+        rules = await self.get_rules([house_uid], session)
+
+        return rules[house_uid]
+
+    async def add_rule(self, house_uid, rule_data: RateRuleCreateModel, session: AsyncSession) -> HouseRateRule:
+        rule = HouseRateRule(house_uid=house_uid, **rule_data.model_dump())
+        session.add(rule)
+        await session.commit()
+        await quote_cache.invalidate(house_uid)
+
+        return rule
+
+    async def delete_rule(self, house_uid, rule_uid: uuid.UUID, session: AsyncSession):
+        stmt = select(HouseRateRule).where(HouseRateRule.house_uid == house_uid, HouseRateRule.rule_uid == rule_uid)
+
+        result = await session.exec(stmt)
+        rule = result.first()
+
+        if rule:
+            await session.delete(rule)
+            await session.commit()
+            await quote_cache.invalidate(house_uid)
+        return rule
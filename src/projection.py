@@ -0,0 +1,18 @@
+from typing import Dict, List, Optional, Sequence
+
+def resolve_projection(fields: Optional[str], projection: Optional[str],
+                       projections: Dict[str, Sequence[str]], allowed: Sequence[str]) -> Optional[List[str]]:
+    # None means "select the whole entity"
+    if fields:
+        columns = list(dict.fromkeys(field.strip() for field in fields.split(",") if field.strip()))
+        unknown = [column for column in columns if column not in allowed]
+        if unknown or not columns:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        return columns
+
+    if projection:
+        if projection not in projections:
+            raise ValueError(f"Unknown projection: {projection}")
+        return list(projections[projection]) if projections[projection] else None
+
+    return None
@@ -1,10 +1,11 @@
-from fastapi import APIRouter, status, Depends
+from fastapi import APIRouter, status, Depends, Request, Response
 from sqlmodel.ext.asyncio.session import AsyncSession
 from .service import ReviewService
 from .schema import ReviewCreateModel
 from src.db.main import get_session
 from src.db.models import User
 from src.auth.dependencies import AccessTokenBearer, get_current_user
+from src.etag import make_etag, not_modified
 
 review_router = APIRouter()
 review_service = ReviewService()
@@ -35,8 +36,17 @@ async def get_review_by_uid(
 @review_router.get("/house/{house_uid}")
 async def get_house_reviews(
     house_uid: str,
+      request: Request,
+      response: Response,
       session: AsyncSession=Depends(get_session),
       token_details: dict=Depends(access_token_bearer)):
+
+    count, last_updated = await review_service.get_house_reviews_version(house_uid, session)
+    etag = make_etag(house_uid, count, last_updated)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    response.headers["ETag"] = etag
     
     review = await review_service.get_all_house_review(house_uid=house_uid, session=session)
     return review
@@ -1,4 +1,5 @@
 from sqlmodel import select, desc
+from sqlalchemy import func
 from sqlmodel.ext.asyncio.session import AsyncSession
 from fastapi.exceptions import HTTPException
 from fastapi import status
@@ -15,7 +16,7 @@ house_service = HouseService()
 class ReviewService:
     async def add_review(self, user_email: str,house_uid: str, review_data: ReviewCreateModel, session: AsyncSession):
         try:
-            house = await house_service.get_house_by_id(house_uid, session)
+            house = await house_service.get_house(house_uid, session)
             user = await user_service.get_user_by_email(email=user_email, session=session)
 
             review_data_dict = review_data.model_dump()
@@ -34,7 +35,7 @@ class ReviewService:
                 )
             new_review.user = user
 
-            new_review.houses = house
+            new_review.house_uid = house.house_uid
 
             session.add(new_review)
 
@@ -90,6 +91,21 @@ class ReviewService:
                 detail="Oops ... Something went wrong"
             )
     
+    async def get_house_reviews_version(self, house_uid: str, session: AsyncSession):
+        try:
+            stmt = select(func.count(Review.uid), func.max(Review.updated_at)).where(Review.house_uid==house_uid)
+
+            result = await session.exec(stmt)
+
+            return result.one()
+
+        except Exception as e:
+            logging.exception(e)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Oops ... Something went wrong"
+            )
+    
     async def delete_review(self,current_user_uid: str, review_uid: str, session: AsyncSession):
         try:
             review = await self.get_review(review_uid, session)
@@ -1,20 +1,46 @@
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from datetime import datetime
-from src.db.main import get_session
-from src.booking.service import BookingService
+from src.db.main import async_session
+from src.booking.service import BookingService, EXPIRY_BATCH_SIZE, END_OF_STAY_BATCH_SIZE
+from src.payments.inbox import webhook_inbox, INBOX_BATCH_SIZE
+from src.images.service import ImageService, PURGE_BATCH_SIZE
+from src.mail.outbox import mail_outbox, OUTBOX_BATCH_SIZE
 
 scheduler = AsyncIOScheduler()
 
 async def send_end_booking_emails():
-    session_gen = get_session()
-    session = await anext(session_gen)
-    try:
-        booking_service = BookingService()
-        now = datetime.now()
-        bookings = await booking_service.end_booking(now, session)
-    finally:
-        await session.close()
+    booking_service = BookingService()
+    async with async_session() as session:
+        # page until a short batch, so memory stays bounded however many stays ended since the last run
+        while await booking_service.end_stays(session) == END_OF_STAY_BATCH_SIZE:
+            pass
+
+async def expire_pending_bookings():
+    booking_service = BookingService()
+    async with async_session() as session:
+        while len(await booking_service.expire_stale_bookings(session)) == EXPIRY_BATCH_SIZE:
+            pass
+
+async def drain_webhook_inbox():
+    async with async_session() as session:
+        while await webhook_inbox.drain(session) == INBOX_BATCH_SIZE:
+            pass
+
+async def drain_mail_outbox():
+    async with async_session() as session:
+        while await mail_outbox.drain(session) == OUTBOX_BATCH_SIZE:
+            pass
+
+async def purge_released_images():
+    image_service = ImageService()
+    async with async_session() as session:
+        while await image_service.purge_released(session) == PURGE_BATCH_SIZE:
+            pass
 
 def start_scheduler():
     scheduler.add_job(send_end_booking_emails, "interval", minutes=720)
+    # max_instances=1 so a long sweep is never overlapped by the next tick
+    scheduler.add_job(expire_pending_bookings, "interval", minutes=1, max_instances=1)
+    scheduler.add_job(drain_webhook_inbox, "interval", seconds=5, max_instances=1)
+    scheduler.add_job(drain_mail_outbox, "interval", seconds=10, max_instances=1)
+    scheduler.add_job(purge_released_images, "interval", minutes=30, max_instances=1)
     scheduler.start()
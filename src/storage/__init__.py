@@ -0,0 +1,23 @@
+from functools import lru_cache
+from pathlib import PurePosixPath
+from src.config import Config
+from .base import StorageBackend
+
+def upload_key_prefix(user_uid) -> str:
+    return f"uploads/{user_uid}/"
+
+def is_upload_key_of(key: str, user_uid) -> bool:
+    # the prefix alone isn't enough, uploads/<uid>/../<other uid>/x still starts with it
+    parts = PurePosixPath(key).parts
+    return key.startswith(upload_key_prefix(user_uid)) and len(parts) > 2 and ".." not in parts
+
+@lru_cache
+def get_storage() -> StorageBackend:
+    if Config.STORAGE_BACKEND == "local":
+        from .local import LocalStorage
+
+        return LocalStorage(Config.LOCAL_STORAGE_DIR, Config.LOCAL_STORAGE_URL, Config.LOCAL_STORAGE_UPLOAD_URL)
+
+    from .b2 import B2Storage
+
+    return B2Storage()
@@ -0,0 +1,108 @@
+import io
+import logging
+import time
+from typing import BinaryIO, Optional
+from urllib.parse import urlsplit
+from starlette.concurrency import run_in_threadpool
+import b2sdk.v2.exception as b2_exception
+from src.b2 import b2_api, get_b2_bucket, B2_UPLOAD_WORKERS, B2_PART_SIZE
+from src.config import Config
+from .base import StorageBackend
+from .presign import presign
+
+UPLOAD_URL_EXPIRY_SECONDS = 15 * 60
+
+class B2Storage(StorageBackend):
+    def _bucket(self):
+        return get_b2_bucket(b2_api())
+
+    async def warm(self) -> None:
+        await run_in_threadpool(self._bucket)
+
+    def url_for(self, key: str) -> str:
+        return self._bucket().get_download_url(key)
+
+    def _upload_stream(self, stream: BinaryIO, key: str, content_type: Optional[str]) -> None:
+        # reads the stream part by part; anything over one part goes up as a parallel large-file upload
+        self._bucket().upload_unbound_stream(
+            stream,
+            key,
+            content_type=content_type,
+            recommended_upload_part_size=B2_PART_SIZE,
+            min_part_size=B2_PART_SIZE,
+            buffers_count=B2_UPLOAD_WORKERS
+        )
+
+    async def save_stream(self, stream: BinaryIO, key: str, content_type: Optional[str] = None) -> str:
+        started = time.perf_counter()
+        await run_in_threadpool(self._upload_stream, stream, key, content_type)
+        logging.info("Uploaded %s (%d bytes) to B2 in %.3fs", key, stream.tell(), time.perf_counter() - started)
+
+        return self.url_for(key)
+
+    async def save_bytes(self, data: bytes, key: str, content_type: Optional[str] = None) -> str:
+        started = time.perf_counter()
+        await run_in_threadpool(self._bucket().upload_bytes, data, key, content_type=content_type)
+        logging.info("Uploaded %s (%d bytes) to B2 in %.3fs", key, len(data), time.perf_counter() - started)
+
+        return self.url_for(key)
+
+    def _read(self, key: str) -> bytes:
+        out = io.BytesIO()
+        self._bucket().download_file_by_name(key).save(out)
+        return out.getvalue()
+
+    async def read(self, key: str) -> bytes:
+        return await run_in_threadpool(self._read, key)
+
+    def _exists(self, key: str) -> bool:
+        try:
+            self._bucket().get_file_info_by_name(key)
+            return True
+        except b2_exception.FileNotPresent:
+            return False
+
+    async def exists(self, key: str) -> bool:
+        return await run_in_threadpool(self._exists, key)
+
+    def _delete(self, key: str) -> None:
+        bucket = self._bucket()
+        try:
+            file_version = bucket.get_file_info_by_name(key)
+        except b2_exception.FileNotPresent:
+            return
+        bucket.delete_file_version(file_version.id_, key)
+
+    async def delete(self, key: str) -> None:
+        await run_in_threadpool(self._delete, key)
+
+    def _size(self, key: str) -> Optional[int]:
+        try:
+            return self._bucket().get_file_info_by_name(key).size
+        except b2_exception.FileNotPresent:
+            return None
+
+    async def get_size(self, key: str) -> Optional[int]:
+        return await run_in_threadpool(self._size, key)
+
+    async def create_upload_target(self, key: str, content_type: str) -> dict:
+        # a presigned S3 PUT is good for this one key only, unlike a native upload token which can
+        # write any name in the bucket (including the shared images/ objects) for a day
+        api = b2_api()
+        endpoint = urlsplit(api.account_info.get_s3_api_url())
+        region = endpoint.hostname.split(".")[1]
+        url = presign(
+            "PUT", endpoint.hostname, f"/{Config.B2_BUCKET_NAME}/{key}", region,
+            Config.B2_KEY_ID, Config.B2_APPLICATION_KEY, UPLOAD_URL_EXPIRY_SECONDS,
+            headers={"Content-Type": content_type}
+        )
+
+        return {
+            "key": key,
+            "method": "PUT",
+            "url": url,
+            # the content type is part of the signature, the client has to send exactly this
+            "headers": {
+                "Content-Type": content_type
+            }
+        }
@@ -0,0 +1,41 @@
+from abc import ABC, abstractmethod
+from typing import BinaryIO, Optional
+
+class StorageBackend(ABC):
+    async def warm(self) -> None:
+        # called once at startup so credentials and buckets aren't resolved inside a request
+        ...
+
+    @abstractmethod
+    def url_for(self, key: str) -> str:
+        ...
+
+    @abstractmethod
+    async def save_stream(self, stream: BinaryIO, key: str, content_type: Optional[str] = None) -> str:
+        ...
+
+    @abstractmethod
+    async def save_bytes(self, data: bytes, key: str, content_type: Optional[str] = None) -> str:
+        ...
+
+    @abstractmethod
+    async def read(self, key: str) -> bytes:
+        ...
+
+    @abstractmethod
+    async def exists(self, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    async def get_size(self, key: str) -> Optional[int]:
+        # size in bytes, None when there is no such object
+        ...
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    async def create_upload_target(self, key: str, content_type: str) -> dict:
+        # where and how a client uploads `key` straight to storage, bypassing the API
+        ...
@@ -0,0 +1,111 @@
+import os
+import shutil
+from pathlib import Path, PurePosixPath
+from typing import AsyncIterator, BinaryIO, Optional
+import aiofiles
+from itsdangerous import URLSafeTimedSerializer
+from starlette.concurrency import run_in_threadpool
+from src.config import Config
+from .base import StorageBackend
+
+UPLOAD_TOKEN_MAX_AGE = 15 * 60
+upload_signer = URLSafeTimedSerializer(
+    secret_key=Config.SECRET_KEY,
+    salt="storage-upload"
+)
+
+class LocalStorage(StorageBackend):
+    def __init__(self, root: str, base_url: str, upload_url: str):
+        self.root = Path(root).resolve()
+        self.base_url = base_url.rstrip("/")
+        self.upload_url = upload_url.rstrip("/")
+
+    def path_for(self, key: str) -> Path:
+        # keys are relative and never step up, even when the result would still land under root
+        if PurePosixPath(key).is_absolute() or ".." in PurePosixPath(key).parts:
+            raise ValueError(f"Invalid storage key: {key}")
+        path = (self.root / key).resolve()
+        if not path.is_relative_to(self.root):
+            raise ValueError(f"Invalid storage key: {key}")
+        return path
+
+    async def warm(self) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def url_for(self, key: str) -> str:
+        return f"{self.base_url}/{key}"
+
+    def _write_stream(self, stream: BinaryIO, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # write next to the target and rename, readers never see a half-written file
+        partial = path.with_name(f".{path.name}.partial")
+        with open(partial, "wb") as f:
+            shutil.copyfileobj(stream, f)
+        os.replace(partial, path)
+
+    async def save_stream(self, stream: BinaryIO, key: str, content_type: Optional[str] = None) -> str:
+        await run_in_threadpool(self._write_stream, stream, self.path_for(key))
+
+        return self.url_for(key)
+
+    def _write_bytes(self, data: bytes, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        partial = path.with_name(f".{path.name}.partial")
+        partial.write_bytes(data)
+        os.replace(partial, path)
+
+    async def save_bytes(self, data: bytes, key: str, content_type: Optional[str] = None) -> str:
+        await run_in_threadpool(self._write_bytes, data, self.path_for(key))
+
+        return self.url_for(key)
+
+    async def read(self, key: str) -> bytes:
+        return await run_in_threadpool(self.path_for(key).read_bytes)
+
+    async def exists(self, key: str) -> bool:
+        return await run_in_threadpool(self.path_for(key).is_file)
+
+    def _size(self, key: str) -> Optional[int]:
+        path = self.path_for(key)
+        return path.stat().st_size if path.is_file() else None
+
+    async def get_size(self, key: str) -> Optional[int]:
+        return await run_in_threadpool(self._size, key)
+
+    async def delete(self, key: str) -> None:
+        await run_in_threadpool(self.path_for(key).unlink, True)
+
+    async def create_upload_target(self, key: str, content_type: str) -> dict:
+        self.path_for(key)
+        token = upload_signer.dumps({"key": key, "content_type": content_type})
+
+        return {
+            "key": key,
+            "method": "PUT",
+            "url": f"{self.upload_url}/{token}",
+            "headers": {
+                "Content-Type": content_type
+            }
+        }
+
+    async def save_chunks(self, chunks: AsyncIterator[bytes], key: str, max_bytes: int) -> int:
+        # receives a direct upload; returns the size, or raises ValueError past max_bytes
+        path = self.path_for(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        partial = path.with_name(f".{path.name}.partial")
+        size = 0
+        try:
+            async with aiofiles.open(partial, "wb") as f:
+                async for chunk in chunks:
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise ValueError(f"Upload exceeds {max_bytes} bytes")
+                    await f.write(chunk)
+            os.replace(partial, path)
+        finally:
+            partial.unlink(missing_ok=True)
+        return size
+
+    def verify_upload_token(self, token: str) -> dict:
+        # raises itsdangerous.BadSignature (or SignatureExpired) for tampered or stale tokens
+        return upload_signer.loads(token, max_age=UPLOAD_TOKEN_MAX_AGE)
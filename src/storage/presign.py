@@ -0,0 +1,48 @@
+import hashlib
+import hmac
+from datetime import datetime, timezone
+from typing import Dict, Optional
+from urllib.parse import quote
+
+# AWS Signature Version 4, query-string flavour; B2's S3-compatible API accepts it as-is
+ALGORITHM = "AWS4-HMAC-SHA256"
+UNSIGNED_PAYLOAD = "UNSIGNED-PAYLOAD"
+
+def _uri_encode(value: str, safe: str = "-_.~") -> str:
+    return quote(value, safe=safe)
+
+def _hmac(key: bytes, msg: str) -> bytes:
+    return hmac.new(key, msg.encode(), hashlib.sha256).digest()
+
+def presign(method: str, host: str, path: str, region: str, access_key: str, secret_key: str, expires: int,
+            headers: Optional[Dict[str, str]] = None, payload_hash: str = UNSIGNED_PAYLOAD,
+            now: Optional[datetime] = None) -> str:
+    # the returned URL is only valid for this method, this exact path and these header values
+    now = now or datetime.now(timezone.utc)
+    amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+    scope = f"{now.strftime('%Y%m%d')}/{region}/s3/aws4_request"
+
+    signed = {"host": host, **{name.lower(): value.strip() for name, value in (headers or {}).items()}}
+    signed_headers = ";".join(sorted(signed))
+    query = {
+        "X-Amz-Algorithm": ALGORITHM,
+        "X-Amz-Credential": f"{access_key}/{scope}",
+        "X-Amz-Date": amz_date,
+        "X-Amz-Expires": str(expires),
+        "X-Amz-SignedHeaders": signed_headers,
+    }
+    canonical_query = "&".join(f"{_uri_encode(k)}={_uri_encode(v)}" for k, v in sorted(query.items()))
+    canonical_uri = _uri_encode(path, safe="/-_.~")
+    canonical_headers = "".join(f"{name}:{signed[name]}\n" for name in sorted(signed))
+    canonical_request = "\n".join(
+        [method, canonical_uri, canonical_query, canonical_headers, signed_headers, payload_hash]
+    )
+
+    string_to_sign = "\n".join(
+        [ALGORITHM, amz_date, scope, hashlib.sha256(canonical_request.encode()).hexdigest()]
+    )
+    signing_key = _hmac(_hmac(_hmac(_hmac(f"AWS4{secret_key}".encode(), now.strftime("%Y%m%d")), region), "s3"),
+                        "aws4_request")
+    signature = hmac.new(signing_key, string_to_sign.encode(), hashlib.sha256).hexdigest()
+
+    return f"https://{host}{canonical_uri}?{canonical_query}&X-Amz-Signature={signature}"
@@ -0,0 +1,40 @@
+from fastapi import APIRouter, HTTPException, Request, status
+from itsdangerous import BadSignature
+from src.images.variants import MAX_IMAGE_BYTES
+from src.storage import get_storage
+from src.storage.local import LocalStorage
+
+storage_router = APIRouter()
+
+# only the local backend needs this, B2 clients PUT straight to a presigned S3 URL
+@storage_router.put("/upload/{token}", status_code=status.HTTP_201_CREATED)
+async def receive_direct_upload(token: str, request: Request):
+    storage = get_storage()
+    if not isinstance(storage, LocalStorage):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+
+    try:
+        target = storage.verify_upload_token(token)
+    except BadSignature:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid or expired upload token"
+        )
+    if request.headers.get("content-type") != target["content_type"]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Content-Type doesn't match the upload token"
+        )
+
+    try:
+        size = await storage.save_chunks(request.stream(), target["key"], MAX_IMAGE_BYTES)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=str(e)
+        )
+
+    return {
+        "key": target["key"],
+        "size": size
+    }
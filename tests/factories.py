@@ -0,0 +1,28 @@
+import uuid
+from src.db.models import House, User
+
+def make_user(role: str = "user") -> User:
+    name = f"{role}-{uuid.uuid4().hex[:8]}"
+    return User(
+        uid=uuid.uuid4(), username=name, email=f"{name}@example.com", firstname=role, lastname="Test",
+        role=role, is_verified=True, password="not-a-hash"
+    )
+
+def make_house(host: User, **values) -> House:
+    return House(**{
+        "house_uid": uuid.uuid4(), "title": "Test House", "address": f"{uuid.uuid4().hex[:6]} Test Street",
+        "state": "Lagos", "bedroom": 2, "bathroom": 1, "price_per_night": 10000,
+        "description": "A house for the tests", "available": True, "user_uid": host.uid, **values
+    })
+
+async def seed_house(sessions, **values):
+    # a host, a guest and one of the host's houses, committed
+    host, guest = make_user("host"), make_user("user")
+    house = make_house(host, **values)
+    async with sessions() as session:
+        session.add_all([host, guest])
+        await session.flush()
+        session.add(house)
+        await session.commit()
+
+    return host, guest, house
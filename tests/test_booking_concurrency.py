@@ -0,0 +1,41 @@
+import asyncio
+from datetime import date, datetime, time, timedelta
+from sqlmodel import select
+from factories import seed_house
+from src.booking.model import Booking
+from src.booking.schema import BookingCreateModel
+from src.booking.service import BookingService
+
+CONCURRENT_BOOKINGS = 200
+
+async def _race(sessions):
+    # every attempt has its own session and connection, like concurrent requests would
+    booking_service = BookingService()
+    _, guest, house = await seed_house(sessions, title="Race House")
+
+    start = datetime.combine(date.today() + timedelta(days=7), time.min)
+    # clients don't all spell the uid the same way, they must still queue on one lock
+    spellings = [str(house.house_uid), str(house.house_uid).upper(), house.house_uid.hex, f"{{{house.house_uid}}}"]
+
+    async def attempt(house_uid: str):
+        booking = BookingCreateModel(
+            house_uid=house_uid, user_uid=str(guest.uid), start_date=start, end_date=start + timedelta(days=3)
+        )
+        async with sessions() as session:
+            return await booking_service.book_house(booking, session)
+
+    results = await asyncio.gather(*[
+        attempt(spellings[i % len(spellings)]) for i in range(CONCURRENT_BOOKINGS)
+    ])
+
+    async with sessions() as session:
+        stored = (await session.exec(select(Booking).where(Booking.house_uid == house.house_uid))).all()
+
+    return results, stored
+
+def test_parallel_bookings_for_one_house_have_exactly_one_winner(run_db):
+    results, stored = run_db(_race, pool_size=20, max_overflow=0, pool_timeout=300)
+
+    winners = [booking for booking in results if booking is not None]
+    assert len(winners) == 1
+    assert [booking.booking_uid for booking in stored] == [winners[0].booking_uid]
@@ -0,0 +1,57 @@
+import asyncio
+import json
+import uuid
+from datetime import date, datetime, time, timedelta
+import pytest
+from fastapi import HTTPException
+from factories import seed_house
+from src.booking.model import Booking, INACTIVE_BOOKING_STATUSES
+from src.booking.schema import BookingCreateModel
+from src.booking.service import BookingService
+
+def _cancel_error(booking) -> HTTPException:
+    booking_service = BookingService()
+
+    async def get_specific_booking(booking_uid, session):
+        return booking
+
+    booking_service.get_specific_booking = get_specific_booking
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(booking_service.cancel_booking(str(uuid.uuid4()), None))
+    return error.value
+
+def test_canceling_an_unknown_booking_is_a_404():
+    assert _cancel_error(None).status_code == 404
+
+@pytest.mark.parametrize("status", INACTIVE_BOOKING_STATUSES)
+def test_canceling_an_inactive_booking_is_a_400(status):
+    booking = Booking(
+        house_uid=uuid.uuid4(), user_uid=uuid.uuid4(), start_date=datetime(2026, 1, 1), end_date=datetime(2026, 1, 3),
+        status=status, amount=20000
+    )
+
+    error = _cancel_error(booking)
+    assert error.status_code == 400
+    assert status in error.detail
+
+async def _cancel_twice(sessions):
+    booking_service = BookingService()
+    _, guest, house = await seed_house(sessions)
+    start = datetime.combine(date.today() + timedelta(days=5), time.min)
+    async with sessions() as session:
+        booking = await booking_service.book_house(BookingCreateModel(
+            house_uid=str(house.house_uid), user_uid=str(guest.uid), start_date=start, end_date=start + timedelta(days=2)
+        ), session)
+    async with sessions() as session:
+        canceled = await booking_service.cancel_booking(str(booking.booking_uid), session)
+    async with sessions() as session:
+        with pytest.raises(HTTPException) as again:
+            await booking_service.cancel_booking(str(booking.booking_uid), session)
+
+    return json.loads(canceled.body), again.value
+
+def test_a_canceled_booking_reopens_the_house_and_cannot_be_canceled_again(run_db):
+    canceled, again = run_db(_cancel_twice)
+
+    assert canceled["House Availability"] is True
+    assert again.status_code == 400
@@ -0,0 +1,32 @@
+from datetime import date, datetime, time, timedelta
+from factories import seed_house
+from src.booking.calendar import house_calendar
+from src.booking.schema import BookingCreateModel
+from src.booking.service import BookingService
+from src.houses.routes import get_house_calendar
+
+def test_calendar_key_is_the_same_for_every_spelling_of_a_uid():
+    uid = "0b6f7c1e-2d9a-4e8b-9f3c-5a1d2e4b6c8f"
+
+    assert house_calendar._key(uid.upper()) == house_calendar._key(uid) == f"calendar:{uid}"
+    assert house_calendar._key(uid.replace("-", "")) == house_calendar._key(uid)
+
+async def _calendar_without_redis(sessions):
+    # nothing listens on the test REDIS_URL, so the endpoint has to answer from the booking table
+    _, guest, house = await seed_house(sessions)
+    check_in = date.today() + timedelta(days=3)
+    async with sessions() as session:
+        await BookingService().book_house(BookingCreateModel(
+            house_uid=str(house.house_uid), user_uid=str(guest.uid),
+            start_date=datetime.combine(check_in, time.min), end_date=datetime.combine(check_in + timedelta(days=2), time.min)
+        ), session)
+    async with sessions() as session:
+        calendar = await get_house_calendar(
+            str(house.house_uid).upper(), check_in - timedelta(days=1), check_in + timedelta(days=2), session, {}
+        )
+
+    return [day["booked"] for day in calendar["days"]]
+
+def test_calendar_falls_back_to_the_bookings_when_redis_is_down(run_db):
+    # the day before, the two booked nights, and the checkout day
+    assert run_db(_calendar_without_redis) == [False, True, True, False]
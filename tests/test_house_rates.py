@@ -0,0 +1,48 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from factories import seed_house
+from src.houses.routes import add_house_rate, delete_house_rate, get_house_rates
+from src.pricing.schema import RateRuleCreateModel
+
+def _owner(host) -> dict:
+    return {"user": {"id": str(host.uid), "role": "host"}}
+
+async def _add_and_read_back(sessions):
+    host, _, house = await seed_house(sessions)
+    async with sessions() as session:
+        added = await add_house_rate(
+            str(house.house_uid), RateRuleCreateModel(kind="weekend", nightly_price=15000), session, _owner(host), True
+        )
+    async with sessions() as session:
+        rates = await get_house_rates(str(house.house_uid), session, {})
+    async with sessions() as session:
+        # however the uid is spelled in the URL
+        upper = await get_house_rates(str(house.house_uid).upper(), session, {})
+
+    return added, rates, upper
+
+def test_rates_endpoint_returns_the_rules_of_the_house(run_db):
+    added, rates, upper = run_db(_add_and_read_back)
+
+    assert [rule.rule_uid for rule in rates] == [added.rule_uid]
+    assert [rule.rule_uid for rule in upper] == [added.rule_uid]
+    assert rates[0].nightly_price == 15000
+
+async def _delete_malformed_rule(sessions):
+    host, _, house = await seed_house(sessions)
+    async with sessions() as session:
+        with pytest.raises(HTTPException) as error:
+            await delete_house_rate(str(house.house_uid), "not-a-rule", session, _owner(host), True)
+
+    return error.value.status_code
+
+def test_deleting_a_malformed_rule_uid_is_a_404(run_db):
+    assert run_db(_delete_malformed_rule) == 404
+
+@pytest.mark.parametrize("house_uid", ["not-a-uuid", "1234"])
+def test_rates_of_a_malformed_house_uid_is_a_404(house_uid):
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(get_house_rates(house_uid, None, {}))
+
+    assert error.value.status_code == 404
@@ -0,0 +1,31 @@
+import asyncio
+import io
+import sys
+from PIL import Image
+from image_workers import IMAGE_VARIANTS, render_variants
+
+# nothing from the app at module level: the spawned workers import this module to run _app_modules
+def _app_modules():
+    return sorted(name for name in sys.modules if name == "src" or name.startswith("src."))
+
+def _png(width: int, height: int) -> bytes:
+    out = io.BytesIO()
+    Image.new("RGB", (width, height), "teal").save(out, format="PNG")
+    return out.getvalue()
+
+def test_variants_keep_the_aspect_ratio_and_never_upscale():
+    variants = render_variants(_png(2400, 1200))
+
+    sizes = {name: Image.open(io.BytesIO(data)).size for name, data in variants.items()}
+    assert sizes == {name: (edge, edge // 2) for name, edge in IMAGE_VARIANTS.items()}
+    assert Image.open(io.BytesIO(render_variants(_png(200, 100))["full"])).size == (200, 100)
+
+def test_image_workers_do_not_import_the_app():
+    from src.images.variants import generate_variants, get_image_executor, shutdown_image_executor
+
+    try:
+        variants = asyncio.run(generate_variants(_png(640, 480)))
+        assert set(variants) == set(IMAGE_VARIANTS)
+        assert get_image_executor().submit(_app_modules).result() == []
+    finally:
+        shutdown_image_executor()
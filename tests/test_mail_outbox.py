@@ -0,0 +1,64 @@
+from datetime import date, datetime, time, timedelta
+import pytest
+from sqlalchemy import update
+from sqlmodel import select
+from factories import seed_house
+from src.booking.model import Booking
+from src.booking.schema import BookingCreateModel
+from src.booking.service import BookingService
+from src.mail import outbox
+from src.mail.model import OutboundEmail
+
+async def _expire_and_drain(sessions, send_message):
+    booking_service = BookingService()
+    _, guest, house = await seed_house(sessions)
+    start = datetime.combine(date.today() + timedelta(days=10), time.min)
+    async with sessions() as session:
+        booking = await booking_service.book_house(BookingCreateModel(
+            house_uid=str(house.house_uid), user_uid=str(guest.uid), start_date=start, end_date=start + timedelta(days=2)
+        ), session)
+        await session.exec(
+            update(Booking).where(Booking.booking_uid == booking.booking_uid).values(expires_at=datetime.now() - timedelta(minutes=1))
+        )
+        await session.commit()
+
+    async with sessions() as session:
+        expired = await booking_service.expire_stale_bookings(session)
+    async with sessions() as session:
+        queued = (await session.exec(select(OutboundEmail).where(OutboundEmail.recipients.contains([guest.email])))).all()
+
+    outbox.mails.send_message = send_message
+    async with sessions() as session:
+        await outbox.mail_outbox.drain(session)
+    async with sessions() as session:
+        drained = (await session.exec(select(OutboundEmail).where(OutboundEmail.recipients.contains([guest.email])))).all()
+
+    return booking, expired, queued, drained
+
+@pytest.fixture
+def restore_mailer():
+    send_message = outbox.mails.send_message
+    yield
+    outbox.mails.send_message = send_message
+
+def test_expiry_notices_are_queued_with_the_expiry_and_sent_by_the_outbox(run_db, restore_mailer):
+    sent = []
+
+    async def send_message(message):
+        sent.append(message)
+
+    booking, expired, queued, drained = run_db(lambda sessions: _expire_and_drain(sessions, send_message))
+
+    assert booking.booking_uid in {row.booking_uid for row in expired}
+    assert [(email.subject, email.status) for email in queued] == [("Booking Expired", "pending")]
+    assert [(email.status, email.attempts) for email in drained] == [("sent", 1)]
+    assert [message.subject for message in sent] == ["Booking Expired"]
+
+def test_a_failed_send_stays_queued_for_a_retry(run_db, restore_mailer):
+    async def send_message(message):
+        raise ConnectionError("SMTP is down")
+
+    _, _, _, drained = run_db(lambda sessions: _expire_and_drain(sessions, send_message))
+
+    assert [(email.status, email.attempts, email.last_error) for email in drained] == [("pending", 1, "SMTP is down")]
+    assert drained[0].next_attempt_at > datetime.now()
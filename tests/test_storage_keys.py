@@ -0,0 +1,41 @@
+import uuid
+import pytest
+from src.storage import is_upload_key_of
+from src.storage.local import LocalStorage
+
+USER = uuid.UUID("5f0c2a9e-7b1d-4c3e-8a6f-9d2b4e1c7a30")
+OTHER = uuid.UUID("a1b2c3d4-e5f6-4a7b-8c9d-0e1f2a3b4c5d")
+
+@pytest.mark.parametrize("key", [
+    f"uploads/{USER}/3f2a.jpg",
+    f"uploads/{USER}/nested/3f2a.webp",
+])
+def test_a_users_own_upload_keys_are_accepted(key):
+    assert is_upload_key_of(key, USER)
+
+@pytest.mark.parametrize("key", [
+    f"uploads/{OTHER}/3f2a.jpg",
+    f"uploads/{USER}/../{OTHER}/3f2a.jpg",
+    f"uploads/{USER}/../../images/ab/abcd/original.jpg",
+    f"uploads/{USER}/",
+    f"/uploads/{USER}/3f2a.jpg",
+    f"images/{USER}/3f2a.jpg",
+])
+def test_keys_outside_the_users_upload_folder_are_rejected(key):
+    assert not is_upload_key_of(key, USER)
+
+@pytest.mark.parametrize("key", [
+    f"uploads/{USER}/../{OTHER}/3f2a.jpg",
+    "../outside.jpg",
+    "/etc/passwd",
+])
+def test_local_storage_refuses_keys_that_step_out_of_place(tmp_path, key):
+    storage = LocalStorage(str(tmp_path), "/media", "/api/v1/storage/upload")
+
+    with pytest.raises(ValueError):
+        storage.path_for(key)
+
+def test_local_storage_maps_a_plain_key_under_its_root(tmp_path):
+    storage = LocalStorage(str(tmp_path), "/media", "/api/v1/storage/upload")
+
+    assert storage.path_for(f"uploads/{USER}/3f2a.jpg") == tmp_path.resolve() / "uploads" / str(USER) / "3f2a.jpg"
@@ -0,0 +1,106 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+import httpx
+import pytest
+from src.payments import fake_stripe, gateway
+from src.payments.breaker import CircuitBreaker
+from src.payments.gateway import PaymentGatewayError, StripeGateway
+
+FAILURE_THRESHOLD = 3
+RESET_TIMEOUT = 0.2
+
+class CountingTransport(httpx.ASGITransport):
+    def __init__(self, app):
+        super().__init__(app=app)
+        self.requests = 0
+
+    async def handle_async_request(self, request):
+        self.requests += 1
+        return await super().handle_async_request(request)
+
+@pytest.fixture
+def stripe(monkeypatch):
+    # the real gateway code, talking to the fake Stripe app in-process
+    monkeypatch.setattr(gateway, "STRIPE_RETRY_BACKOFF", 0)
+    monkeypatch.setattr(fake_stripe, "FAILURE_RATE", 0)
+    monkeypatch.setattr(fake_stripe, "sessions", {})
+    stripe_gateway = StripeGateway("http://fake-stripe", "sk_test", transport=CountingTransport(fake_stripe.app))
+    stripe_gateway.breaker = CircuitBreaker(failure_threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT)
+    return stripe_gateway
+
+async def _checkout(stripe_gateway: StripeGateway, booking_uid) -> dict:
+    return await stripe_gateway.create_checkout_session(
+        booking_uid, 25000, "NGN", "Booking: Test House", "guest@example.com", datetime.now() + timedelta(minutes=31)
+    )
+
+async def _run(stripe_gateway: StripeGateway, steps):
+    try:
+        return await steps()
+    finally:
+        await stripe_gateway.aclose()
+
+def test_checkout_sessions_are_created_once_per_booking(stripe):
+    booking_uid = uuid.uuid4()
+
+    async def steps():
+        return await _checkout(stripe, booking_uid), await _checkout(stripe, booking_uid), await _checkout(stripe, uuid.uuid4())
+
+    first, retried, other = asyncio.run(_run(stripe, steps))
+
+    assert first["metadata"] == {"booking_uid": str(booking_uid)}
+    assert first["amount_total"] == 25000 * 100
+    # same idempotency key, so the retry gets the session Stripe already made
+    assert retried["id"] == first["id"]
+    assert other["id"] != first["id"]
+    assert stripe.breaker.state == "closed"
+
+def test_the_breaker_opens_after_failures_and_recovers(stripe, monkeypatch):
+    async def steps():
+        monkeypatch.setattr(fake_stripe, "FAILURE_RATE", 1.0)
+        for _ in range(FAILURE_THRESHOLD):
+            with pytest.raises(PaymentGatewayError):
+                await _checkout(stripe, uuid.uuid4())
+        # each failed checkout was the first try plus STRIPE_MAX_RETRIES retries
+        attempts = stripe.transport.requests
+        opened = stripe.breaker.state
+
+        # open: rejected straight away, Stripe isn't called
+        monkeypatch.setattr(fake_stripe, "FAILURE_RATE", 0)
+        requests = stripe.transport.requests
+        with pytest.raises(PaymentGatewayError):
+            await _checkout(stripe, uuid.uuid4())
+        rejected_requests = stripe.transport.requests - requests
+
+        await asyncio.sleep(RESET_TIMEOUT)
+        half_open = stripe.breaker.state
+        recovered = await _checkout(stripe, uuid.uuid4())
+
+        return attempts, opened, rejected_requests, half_open, recovered
+
+    attempts, opened, rejected_requests, half_open, recovered = asyncio.run(_run(stripe, steps))
+
+    assert attempts == FAILURE_THRESHOLD * (gateway.STRIPE_MAX_RETRIES + 1)
+    assert opened == "open"
+    assert rejected_requests == 0
+    assert half_open == "half-open"
+    assert recovered["status"] == "open"
+    assert stripe.breaker.state == "closed"
+
+def test_a_failed_trial_call_opens_the_breaker_again(stripe, monkeypatch):
+    async def steps():
+        monkeypatch.setattr(fake_stripe, "FAILURE_RATE", 1.0)
+        for _ in range(FAILURE_THRESHOLD):
+            with pytest.raises(PaymentGatewayError):
+                await _checkout(stripe, uuid.uuid4())
+        await asyncio.sleep(RESET_TIMEOUT)
+        requests = stripe.transport.requests
+        with pytest.raises(PaymentGatewayError):
+            await _checkout(stripe, uuid.uuid4())
+        return stripe.transport.requests - requests
+
+    trial_requests = asyncio.run(_run(stripe, steps))
+
+    # the half-open trial went out, failed, and opened the breaker again
+    assert trial_requests == gateway.STRIPE_MAX_RETRIES + 1
+    assert stripe.breaker.state == "open"